@@ -0,0 +1,139 @@
+import logging
+from enum import StrEnum
+
+
+class AdmissionDecision(StrEnum):
+    accept = "accept"
+    truncate = "truncate"
+    reject = "reject"
+
+
+class _Ewma:
+    def __init__(self, alpha: float):
+        self._alpha = alpha
+        self.value: float | None = None
+
+    def update(self, sample: float):
+        self.value = sample if self.value is None else self.value + self._alpha * (sample - self.value)
+
+
+class VoiceLatencyModel:
+    """单个音色的滑动平均估计：每字符合成耗时、每字符音频时长与条目平均字数"""
+
+    def __init__(self, alpha: float = 0.2):
+        self._synthesis = _Ewma(alpha)
+        self._duration = _Ewma(alpha)
+        self._chars = _Ewma(alpha)
+
+    @property
+    def synthesis_per_char(self) -> float | None:
+        return self._synthesis.value
+
+    @property
+    def duration_per_char(self) -> float | None:
+        return self._duration.value
+
+    @property
+    def average_chars(self) -> float | None:
+        return self._chars.value
+
+    @property
+    def ready(self) -> bool:
+        return self._synthesis.value is not None and self._duration.value is not None
+
+    def observe_synthesis(self, chars: int, seconds: float):
+        if chars > 0:
+            self._synthesis.update(seconds / chars)
+
+    def observe_clip(self, chars: int, seconds: float):
+        if chars > 0 and seconds > 0:
+            self._duration.update(seconds / chars)
+            self._chars.update(chars)
+
+
+class AdmissionController:
+    """按实测延迟做准入控制：预测新条目开始播放的时间，超出延迟预算的拒绝，播放结束会超出预算的截短。
+
+    预测开始时间 = 播放引擎中剩余的音频 + 前面各条的预计音频时长；合成与前面的播放重叠，
+    因此只有自身合成耗时更长时才以合成耗时为准。前面的条目按全部积压计，对插队的高优先级条目偏保守。
+    估计按音色分开记录，切换模型后使用对应音色的估计；尚无估计时全部放行。
+    """
+    _MAX_CAPACITY = 100
+
+    def __init__(self, latency_budget: float, min_chars: int = 4, alpha: float = 0.2):
+        self._budget = latency_budget
+        self._min_chars = min_chars
+        self._alpha = alpha
+        self._voices: dict[str, VoiceLatencyModel] = {}
+        self._voice = ""
+        self.rejected = 0
+        self.truncated = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._budget > 0
+
+    @property
+    def latency_budget(self) -> float:
+        return self._budget
+
+    @property
+    def model(self) -> VoiceLatencyModel:
+        if self._voice not in self._voices:
+            self._voices[self._voice] = VoiceLatencyModel(self._alpha)
+        return self._voices[self._voice]
+
+    def set_voice(self, voice: str):
+        self._voice = voice
+
+    def observe_synthesis(self, chars: int, seconds: float):
+        self.model.observe_synthesis(chars, seconds)
+
+    def observe_clip(self, chars: int, seconds: float):
+        self.model.observe_clip(chars, seconds)
+
+    def predict_start(self, chars: int, ahead_chars: int, playing_seconds: float) -> float | None:
+        model = self.model
+        if not model.ready:
+            return None
+        ahead = playing_seconds + ahead_chars * model.duration_per_char
+        return max(ahead, chars * model.synthesis_per_char)
+
+    def admit(self, chars: int, ahead_chars: int, playing_seconds: float) -> tuple[AdmissionDecision, int]:
+        """返回 (决定, 允许的字数)"""
+        if not self.enabled:
+            return AdmissionDecision.accept, chars
+        start = self.predict_start(chars, ahead_chars, playing_seconds)
+        if start is None:
+            return AdmissionDecision.accept, chars
+        if start > self._budget:
+            self.rejected += 1
+            logging.info(f"[TTS] 预计 {start:.1f}s 后才能播放，超出延迟预算，已拒绝")
+            return AdmissionDecision.reject, 0
+        allowed = int((self._budget - start) / self.model.duration_per_char)
+        if allowed >= chars:
+            return AdmissionDecision.accept, chars
+        if allowed < self._min_chars:
+            self.rejected += 1
+            return AdmissionDecision.reject, 0
+        self.truncated += 1
+        return AdmissionDecision.truncate, allowed
+
+    def effective_queue_size(self, fallback: int) -> int:
+        """延迟预算内按平均条目长度能播完的条数；未启用或尚无估计时返回 fallback"""
+        model = self.model
+        if not self.enabled or not model.ready or not model.average_chars:
+            return fallback
+        per_item = model.average_chars * model.duration_per_char
+        return min(max(int(self._budget / per_item), 1), self._MAX_CAPACITY)
+
+    def stats(self) -> dict:
+        model = self.model
+        return {
+            "voice": self._voice,
+            "synthesis_per_char": model.synthesis_per_char,
+            "duration_per_char": model.duration_per_char,
+            "average_chars": model.average_chars,
+            "rejected": self.rejected,
+            "truncated": self.truncated,
+        }
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.Metrics import cache_lookups
+
+
+def cache_key(*fields: str) -> str:
+    """按合成参数计算内容地址，任一参数变化都会得到不同的键"""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in fields:
+        digest.update(field.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class _DiskEntry:
+    __slots__ = ("size", "hits", "last_access")
+
+    def __init__(self, size: int, hits: int = 0, last_access: float = 0.0):
+        self.size = size
+        self.hits = hits
+        self.last_access = last_access
+
+
+class AudioCache:
+    """合成音频的两级缓存：内存 LRU 在前，按字节数限额的磁盘存储在后。
+
+    磁盘层按命中次数淘汰（LFU），次数相同时淘汰最久未访问的条目。
+    """
+    _SUFFIX = ".wav"
+
+    def __init__(self, memory_max_bytes: int, disk_dir: str = "", disk_max_bytes: int = 0):
+        self._memory_max_bytes = memory_max_bytes
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+
+        self._disk_dir = Path(disk_dir) if disk_dir and disk_max_bytes > 0 else None
+        self._disk_max_bytes = disk_max_bytes
+        self._disk: dict[str, _DiskEntry] = {}
+        self._disk_bytes = 0
+        # 正在写入磁盘的键：写入在线程中进行，期间同一个键的再次写入直接跳过
+        self._pending: set[str] = set()
+        if self._disk_dir is not None:
+            self._load_disk_index()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    @property
+    def hits(self) -> int:
+        return self._memory_hits + self._disk_hits
+
+    @property
+    def memory_hits(self) -> int:
+        return self._memory_hits
+
+    @property
+    def disk_hits(self) -> int:
+        return self._disk_hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self._misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def bytes_saved(self) -> int:
+        """命中缓存而免于向后端请求的音频字节数"""
+        return self._bytes_saved
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def _load_disk_index(self):
+        self._disk_dir.mkdir(parents=True, exist_ok=True)
+        for path in self._disk_dir.glob(f"*{self._SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            # 重启后命中次数归零，以文件访问时间作为最近使用时间
+            self._disk[path.stem] = _DiskEntry(stat.st_size, 0, stat.st_mtime)
+            self._disk_bytes += stat.st_size
+        self._evict_disk(0)
+        logging.info(f"[TTS][Cache] 磁盘缓存已加载 {len(self._disk)} 条，共 {self._disk_bytes // 1024} KB")
+
+    def _disk_path(self, key: str) -> Path:
+        return self._disk_dir / f"{key}{self._SUFFIX}"
+
+    def _put_memory(self, key: str, data: bytes):
+        if len(data) > self._memory_max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self._memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self, incoming: int):
+        while self._disk and self._disk_bytes + incoming > self._disk_max_bytes:
+            key = min(self._disk, key=lambda k: (self._disk[k].hits, self._disk[k].last_access))
+            entry = self._disk.pop(key)
+            self._disk_bytes -= entry.size
+            try:
+                self._disk_path(key).unlink(missing_ok=True)
+            except OSError as e:
+                logging.warning(f"[TTS][Cache] 删除缓存文件失败: {e}")
+
+    def _read_disk(self, key: str) -> bytes | None:
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key: str, data: bytes):
+        path = self._disk_path(key)
+        # 临时文件名唯一，并发写入互不覆盖；加载索引时只扫描 .wav，残留的临时文件不会被当作缓存
+        tmp = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    async def get(self, key: str) -> bytes | None:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self._memory_hits += 1
+            cache_lookups.inc("memory_hit")
+            self._bytes_saved += len(data)
+            return data
+        entry = self._disk.get(key)
+        if entry is not None:
+            data = await asyncio.to_thread(self._read_disk, key)
+            if data is not None:
+                entry.hits += 1
+                entry.last_access = time.time()
+                self._disk_hits += 1
+                cache_lookups.inc("disk_hit")
+                self._bytes_saved += len(data)
+                self._put_memory(key, data)
+                return data
+            # 文件被外部删除，同步索引
+            self._disk.pop(key, None)
+            self._disk_bytes -= entry.size
+        self._misses += 1
+        cache_lookups.inc("miss")
+        return None
+
+    async def put(self, key: str, data: bytes):
+        if not data:
+            return
+        self._put_memory(key, data)
+        if (self._disk_dir is None or key in self._disk or key in self._pending
+                or len(data) > self._disk_max_bytes):
+            return
+        # 在 await 之前占住该键，避免并发的相同请求重复写入并重复计入字节数
+        self._pending.add(key)
+        try:
+            self._evict_disk(len(data))
+            await asyncio.to_thread(self._write_disk, key, data)
+        except OSError as e:
+            logging.warning(f"[TTS][Cache] 写入缓存文件失败: {e}")
+            return
+        finally:
+            self._pending.discard(key)
+        self._disk[key] = _DiskEntry(len(data), 0, time.time())
+        self._disk_bytes += len(data)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "hits": self.hits,
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_ratio": self.hit_ratio,
+            "bytes_saved": self._bytes_saved,
+            "memory_bytes": self._memory_bytes,
+            "disk_bytes": self._disk_bytes,
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import struct
+
+from PySide6.QtMultimedia import QAudioFormat
+
+from Exceptions import TTSClientException
+
+
+class WavFormat:
+    def __init__(self, sample_rate: int, channels: int, sample_width: int):
+        self._sample_rate = sample_rate
+        self._channels = channels
+        self._sample_width = sample_width
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    @property
+    def sample_width(self) -> int:
+        return self._sample_width
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self._sample_rate * self._channels * self._sample_width
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, WavFormat) and self._sample_rate == other._sample_rate
+                and self._channels == other._channels and self._sample_width == other._sample_width)
+
+    def __hash__(self) -> int:
+        return hash((self._sample_rate, self._channels, self._sample_width))
+
+    def to_qt(self) -> QAudioFormat:
+        if self._sample_width != 2:
+            raise TTSClientException(f"不支持的采样位宽: {self._sample_width * 8} bit")
+        fmt = QAudioFormat()
+        fmt.setSampleRate(self._sample_rate)
+        fmt.setChannelCount(self._channels)
+        fmt.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+        return fmt
+
+
+def parse_wav_header(data: bytes | bytearray | memoryview) -> tuple[WavFormat, int] | None:
+    """解析 RIFF/WAVE 头，返回 (格式, PCM 数据起始偏移)。数据不足以解析到 data 块时返回 None。
+
+    流式合成的 WAV 头中 data 块长度为 0 或占位值，因此只取偏移，不信任长度。
+    """
+    if len(data) < 12:
+        return None
+    if bytes(data[0:4]) != b"RIFF" or bytes(data[8:12]) != b"WAVE":
+        raise TTSClientException("音频数据不是 WAV 格式")
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"data":
+            if fmt is None:
+                raise TTSClientException("WAV 缺少 fmt 块")
+            return fmt, body
+        if body + chunk_size > len(data):
+            return None
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            fmt = WavFormat(sample_rate, channels, bits // 8)
+        # RIFF 块按偶数字节对齐
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def build_wav(fmt: WavFormat, pcm: bytes) -> bytes:
+    """为 PCM 数据补上长度正确的 WAV 头（流式响应的头中长度为占位值）"""
+    block_align = fmt.channels * fmt.sample_width
+    header = struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + len(pcm), b"WAVE", b"fmt ", 16, 1,
+                         fmt.channels, fmt.sample_rate, fmt.bytes_per_second, block_align,
+                         fmt.sample_width * 8, b"data", len(pcm))
+    return header + pcm
+
+
+class PcmStream:
+    """边下载边播放的 PCM 流：先缓存到 WAV 头解析完成，之后按块交给播放器"""
+
+    def __init__(self):
+        self._header = bytearray()
+        self._format: WavFormat | None = None
+        self._chunks: asyncio.Queue[bytes | None] = asyncio.Queue()
+        self._format_ready = asyncio.Event()
+        self._closed = False
+
+    @property
+    def format(self) -> WavFormat | None:
+        return self._format
+
+    def feed(self, data: bytes):
+        if self._closed or not data:
+            return
+        if self._format is None:
+            self._header.extend(data)
+            parsed = parse_wav_header(self._header)
+            if parsed is None:
+                return
+            self._format, offset = parsed
+            data = bytes(self._header[offset:])
+            self._header = bytearray()
+            self._format_ready.set()
+            if not data:
+                return
+        self._chunks.put_nowait(data)
+
+    def finish(self):
+        """输入结束（包括出错或被取消），播放器读完已有数据后退出"""
+        if not self._closed:
+            self._closed = True
+            self._chunks.put_nowait(None)
+            self._format_ready.set()
+
+    async def wait_format(self) -> WavFormat | None:
+        await self._format_ready.wait()
+        return self._format
+
+    async def chunks(self):
+        while True:
+            chunk = await self._chunks.get()
+            if chunk is None:
+                return
+            yield chunk
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager, suppress
+from typing import Awaitable, Callable
+
+import aiohttp
+from yarl import URL
+
+from Exceptions import AITTSClientException, CircuitOpenException
+
+# 请求在本地就被拒绝、没有到达后端：熔断中，或 URL 本身无效。不能说明后端不健康，不计入失败
+_LOCAL_REJECTIONS = (CircuitOpenException, aiohttp.InvalidURL)
+
+
+class Backend:
+    """一个 GPT-SoVITS 实例：进行中的请求数、延迟滑动平均、健康状态与已载入的模型"""
+    _ALPHA = 0.2
+    _EJECT_AFTER = 3
+
+    def __init__(self, url: str):
+        self._url = url
+        self._outstanding = 0
+        self._latency: float | None = None
+        self._failures = 0
+        self._healthy = True
+        # 已载入的模型：loaded_weights 决定路由；两个权重路径只在真实切换成功后记录，用于跳过重复切换
+        self.loaded_weights: str | None = None
+        self.loaded_gpt_path: str | None = None
+        self.loaded_sovits_path: str | None = None
+        # 刚完成真实切换、尚未预热
+        self.cold = False
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def outstanding(self) -> int:
+        return self._outstanding
+
+    @property
+    def latency(self) -> float | None:
+        return self._latency
+
+    @property
+    def healthy(self) -> bool:
+        return self._healthy
+
+    @property
+    def load(self) -> float:
+        """延迟加权的负载，越低越优先。未测过延迟的实例按 1 秒估计"""
+        return (self._outstanding + 1) * (self._latency or 1.0)
+
+    def record_success(self, latency: float):
+        self._latency = latency if self._latency is None else self._latency + self._ALPHA * (latency - self._latency)
+        self._failures = 0
+
+    def record_failure(self):
+        self._failures += 1
+        if self._healthy and self._failures >= self._EJECT_AFTER:
+            self._healthy = False
+            logging.warning(f"[TTS][Pool] 连续失败 {self._failures} 次，摘除后端 {self._url}")
+
+    def reset_residency(self):
+        """实例状态未知（例如重启后），清空已载入模型的记录"""
+        self.loaded_weights = None
+        self.loaded_gpt_path = None
+        self.loaded_sovits_path = None
+        self.cold = False
+
+    @contextmanager
+    def track(self):
+        """在请求期间计入进行中的请求数"""
+        self._outstanding += 1
+        try:
+            yield self
+        finally:
+            self._outstanding -= 1
+
+    def eject(self):
+        self._failures = max(self._failures, self._EJECT_AFTER)
+        if self._healthy:
+            self._healthy = False
+            logging.warning(f"[TTS][Pool] 健康检查失败，摘除后端 {self._url}")
+
+    def mark_healthy(self) -> bool:
+        """健康检查通过；返回 True 表示此前被摘除、本次重新加入"""
+        self._failures = 0
+        if self._healthy:
+            return False
+        self._healthy = True
+        logging.info(f"[TTS][Pool] 后端恢复，重新加入 {self._url}")
+        return True
+
+
+class BackendPool:
+    """多个 GPT-SoVITS 后端的负载均衡池：按延迟加权的最少进行中请求分发，定期健康检查，自动摘除与恢复"""
+
+    def __init__(self, urls: list[str], session: Callable[[], aiohttp.ClientSession], health_interval: float = 5.0,
+                 on_readmit: Callable[[Backend], Awaitable[None]] | None = None,
+                 is_available: Callable[[Backend], bool] | None = None):
+        if not urls:
+            raise AITTSClientException("未配置任何 GPT-SoVITS 后端")
+        self._backends = [Backend(url) for url in urls]
+        self._session = session
+        self._health_interval = health_interval
+        self._on_readmit = on_readmit
+        # 额外的可用性判断，例如 HTTP 层熔断器是否打开
+        self._is_available = is_available or (lambda backend: True)
+        self._health_task: asyncio.Task | None = None
+
+    @property
+    def backends(self) -> list[Backend]:
+        return self._backends.copy()
+
+    def _usable(self, backend: Backend, weights: str) -> bool:
+        return backend.healthy and backend.loaded_weights == weights and self._is_available(backend)
+
+    def ready(self, weights: str) -> list[Backend]:
+        return [backend for backend in self._backends if self._usable(backend, weights)]
+
+    def has_ready(self, weights: str) -> bool:
+        return any(self._usable(backend, weights) for backend in self._backends)
+
+    @asynccontextmanager
+    async def acquire(self, weights: str):
+        """选出已载入指定模型、负载最低的健康后端。请求抛出的异常计入其失败次数，本地拒绝的除外"""
+        candidates = self.ready(weights)
+        if not candidates:
+            raise AITTSClientException(f"没有已载入模型 {weights} 的可用后端")
+        backend = min(candidates, key=lambda b: b.load)
+        start = time.perf_counter()
+        with backend.track():
+            try:
+                yield backend
+            except (asyncio.CancelledError, *_LOCAL_REJECTIONS):
+                raise
+            except Exception:
+                backend.record_failure()
+                raise
+            backend.record_success(time.perf_counter() - start)
+
+    async def for_each(self, action: Callable[[Backend], Awaitable[bool]]) -> list[Backend]:
+        """在所有后端上并发执行操作，返回执行成功的后端"""
+        results = await asyncio.gather(*(action(backend) for backend in self._backends), return_exceptions=True)
+        succeeded = []
+        for backend, result in zip(self._backends, results):
+            if isinstance(result, BaseException):
+                logging.error(AITTSClientException(f"后端 {backend.url} 操作失败: {result}"))
+                if not isinstance(result, _LOCAL_REJECTIONS):
+                    backend.record_failure()
+            elif result:
+                succeeded.append(backend)
+        return succeeded
+
+    async def _probe(self, backend: Backend) -> bool:
+        # api_v2 没有专门的健康检查接口，能在超时内返回非 5xx 响应即视为存活
+        timeout = aiohttp.ClientTimeout(total=min(self._health_interval, 3.0))
+        try:
+            async with self._session().get(URL(backend.url) / "tts", timeout=timeout) as resp:
+                return resp.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def _check(self, backend: Backend):
+        if not await self._probe(backend):
+            # 健康检查失败直接摘除，不等待请求失败累积
+            backend.eject()
+            return
+        if backend.mark_healthy():
+            # 实例可能重启过，已载入的模型未知
+            backend.reset_residency()
+        if backend.loaded_weights is None and self._on_readmit is not None:
+            # 重新加入或上次切换失败的后端，补发当前模型
+            await self._on_readmit(backend)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self._check(backend) for backend in self._backends))
+            await asyncio.sleep(self._health_interval)
+
+    def start(self):
+        if self._health_task is None and self._health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._health_task
+        self._health_task = None
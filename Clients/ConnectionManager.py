@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager, suppress
+
+import aiohttp
+
+from Exceptions import RsocketClientException
+
+
+class EndpointStats:
+    """单个 rsocket 端点的健康度：握手 RTT 与错误率均为指数滑动平均"""
+    _ALPHA = 0.3
+
+    def __init__(self, url: str):
+        self._url = url
+        self._rtt: float | None = None
+        self._error_rate = 0.0
+        self._last_failure = 0.0
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def rtt(self) -> float | None:
+        return self._rtt
+
+    @property
+    def error_rate(self) -> float:
+        return self._error_rate
+
+    @property
+    def score(self) -> float:
+        """分数越低越健康。未测量过的端点按 0 RTT 处理，保证会被尝试"""
+        rtt = self._rtt or 0.0
+        penalty = 1.0 if time.monotonic() - self._last_failure < 5 else 0.0
+        return (rtt + 0.05) * (1 + 10 * self._error_rate) + penalty
+
+    def record_success(self, rtt: float):
+        self._rtt = rtt if self._rtt is None else self._rtt + self._ALPHA * (rtt - self._rtt)
+        self._error_rate -= self._ALPHA * self._error_rate
+
+    def record_failure(self):
+        self._error_rate += self._ALPHA * (1 - self._error_rate)
+        self._last_failure = time.monotonic()
+
+
+class ReconnectBackoff:
+    """单条链路（websocket 或分片通道）的重连节奏：首次失败立即重试，之后按 full jitter 指数退避"""
+
+    def __init__(self, base_delay: float = 0.5, max_delay: float = 30.0, stable_period: float = 10.0):
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._stable_period = stable_period
+        self._attempt = 0
+        self._connected_at: float | None = None
+        self._disconnected_at: float | None = None
+
+    @property
+    def attempt(self) -> int:
+        return self._attempt
+
+    def next_delay(self) -> float:
+        if self._attempt == 0:
+            return 0.0
+        cap = min(self._max_delay, self._base_delay * (2 ** (self._attempt - 1)))
+        return random.uniform(0, cap)
+
+    async def wait(self, stop_event: asyncio.Event):
+        delay = self.next_delay()
+        if delay > 0:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop_event.wait(), timeout=delay)
+
+    def mark_failed(self):
+        self._attempt += 1
+
+    def mark_connected(self) -> float | None:
+        """返回本次从断开到恢复的间隔，首次连接返回 None"""
+        now = time.monotonic()
+        self._connected_at = now
+        if self._disconnected_at is None:
+            return None
+        return now - self._disconnected_at
+
+    def mark_disconnected(self):
+        now = time.monotonic()
+        # 连接维持足够久才清零退避次数，避免端点反复秒断时空转
+        if self._connected_at is not None and now - self._connected_at >= self._stable_period:
+            self._attempt = 0
+        else:
+            self._attempt += 1
+        self._connected_at = None
+        self._disconnected_at = now
+
+
+class ConnectionManager:
+    """管理弹幕中继的 websocket 连接：共享长连接会话、多端点择优，并汇总各链路的重连间隔"""
+
+    def __init__(self, urls: list[str], base_delay: float = 0.5, max_delay: float = 30.0):
+        if not urls:
+            raise RsocketClientException("未配置任何 rsocket 端点")
+        self._endpoints = [EndpointStats(url) for url in urls]
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._session: aiohttp.ClientSession | None = None
+
+        self._last_reconnect_gap = 0.0
+        self._max_reconnect_gap = 0.0
+        self._reconnect_count = 0
+
+    @property
+    def endpoints(self) -> list[EndpointStats]:
+        return self._endpoints.copy()
+
+    @property
+    def last_reconnect_gap(self) -> float:
+        """最近一次从断开到重新连上的耗时（秒）"""
+        return self._last_reconnect_gap
+
+    @property
+    def max_reconnect_gap(self) -> float:
+        return self._max_reconnect_gap
+
+    @property
+    def reconnect_count(self) -> int:
+        return self._reconnect_count
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    def new_backoff(self) -> ReconnectBackoff:
+        return ReconnectBackoff(self._base_delay, self._max_delay)
+
+    def best_endpoint(self) -> EndpointStats:
+        return min(self._endpoints, key=lambda endpoint: endpoint.score)
+
+    def record_reconnect(self, backoff: ReconnectBackoff):
+        gap = backoff.mark_connected()
+        if gap is not None:
+            self._last_reconnect_gap = gap
+            self._max_reconnect_gap = max(self._max_reconnect_gap, gap)
+            self._reconnect_count += 1
+            logging.info(f"[DanmakuClient] 重连耗时 {gap:.2f}s")
+
+    @asynccontextmanager
+    async def connect(self, endpoint: EndpointStats, backoff: ReconnectBackoff):
+        """建立到指定端点的 websocket，握手耗时计入 RTT，异常计入错误率"""
+        start = time.perf_counter()
+        try:
+            websocket = await self.session.ws_connect(endpoint.url)
+        except Exception:
+            endpoint.record_failure()
+            backoff.mark_failed()
+            raise
+        endpoint.record_success(time.perf_counter() - start)
+        self.record_reconnect(backoff)
+        try:
+            async with websocket:
+                yield websocket
+        except Exception:
+            endpoint.record_failure()
+            raise
+        finally:
+            backoff.mark_disconnected()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
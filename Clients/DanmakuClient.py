@@ -1,11 +1,13 @@
 import asyncio
 import json
 import logging
+import time
 from asyncio import Event
+from collections import deque
+from collections.abc import Callable
 from datetime import timedelta
 
-import aiohttp
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Signal, QTimer
 from rsocket.helpers import single_transport_provider
 from rsocket.payload import Payload
 from rsocket.rsocket_client import RSocketClient
@@ -13,18 +15,94 @@ from rsocket.streams.stream_from_async_generator import StreamFromAsyncGenerator
 from rsocket.transports.aiohttp_websocket import TransportAioHttpClient
 
 from Exceptions import DanmakuClientException, RsocketClientException
-from Models import ResponseMessageDto, DanmakuClientConfig
+from Models import ResponseMessageDto, DanmakuClientConfig, is_danmu_frame
+from utils.Metrics import record_received
+from .ConnectionManager import ConnectionManager
+from .DanmakuRecorder import CaptureWriter, ReplaySource
+from .DedupIndex import DedupIndex
+from .FlowControl import CreditController
+
+
+async def wait_first(*events: Event):
+    """等待任一事件触发，并清理其余等待任务"""
+    tasks = [asyncio.create_task(event.wait()) for event in events]
+    _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
 
 
 class DanmakuClient(QObject):
     danmu_received = Signal(ResponseMessageDto)
+    danmu_batch_received = Signal(list)
     status_changed = Signal(str)
 
     def __init__(self, danmaku_config: dict):
         super().__init__()
         self._config = DanmakuClientConfig(danmaku_config)
-        self._worker_task = None
+        self._worker_tasks: list[asyncio.Task] = []
         self._stop_event = Event()
+        self._status = "已断开"
+        self._active_shards: set[int] = set()
+        self._dedup: DedupIndex | None = None
+        if self._config.dedup_window > 0:
+            self._dedup = DedupIndex(self._config.dedup_max_entries, self._config.dedup_window)
+        # 重新订阅后的重放窗口截止时间（monotonic），在此之前没有服务端 id 的消息也按内容去重
+        self._subscribed_shards: set[int] = set()
+        self._replay_until = 0.0
+        self._connection = ConnectionManager(
+            self._config.websocket_urls,
+            base_delay=self._config.reconnect_base_delay,
+            max_delay=self._config.reconnect_max_delay
+        )
+
+        # 批量投递缓冲区，满时丢弃最旧的弹幕
+        self._buffer: deque[ResponseMessageDto] = deque()
+        self._dropped_count = 0
+        self._reported_dropped = 0
+        self._tick_timer = QTimer(self)
+        self._tick_timer.setInterval(self._config.batch_interval_ms)
+        self._tick_timer.timeout.connect(self._on_tick)
+
+        # 流控：活跃订阅者按下游消费能力补充信用
+        self._subscribers: set[InternalSubscriber] = set()
+        self._capacity_provider: Callable[[], int] | None = None
+
+        # 抓包：记录收到的原始负载，供离线回放与基准测试
+        self._capture: CaptureWriter | None = None
+
+    @property
+    def batch_mode(self) -> bool:
+        return self._config.batch_mode
+
+    @property
+    def dropped_count(self) -> int:
+        return self._dropped_count
+
+    @property
+    def connection(self) -> ConnectionManager:
+        return self._connection
+
+    @property
+    def dedup(self) -> DedupIndex | None:
+        return self._dedup
+
+    def set_capacity_provider(self, provider: Callable[[], int] | None):
+        """设置下游（TTS 队列）剩余容量的查询函数，用于计算信用窗口"""
+        self._capacity_provider = provider
+
+    @property
+    def credit_demand(self) -> int:
+        """所有通道合计应保持的在途信用：渲染速率 × 周期数 + TTS 余量，且不超过缓冲区余量"""
+        render_window = self._config.max_batch_size * self._config.credit_window_ticks
+        tts_headroom = max(self._capacity_provider(), 0) if self._capacity_provider else 0
+        buffer_headroom = self._config.buffer_size - len(self._buffer)
+        return max(1, min(render_window + tts_headroom, buffer_headroom))
+
+    @property
+    def credit_share(self) -> int:
+        """单个通道的信用窗口，按活跃通道数平分"""
+        shards = max(len(self._subscribers), 1)
+        return max(1, -(-self.credit_demand // shards))
 
     @property
     def subscribe_data(self) -> dict:
@@ -36,68 +114,231 @@ class DanmakuClient(QObject):
         }
         return subscribe_data
 
+    @property
+    def shards(self) -> list[list[str]]:
+        """将 taskIds 轮流分配到各分片。同一房间只属于一个分片，合并后仍保持房间内顺序"""
+        task_ids = self._config.task_ids
+        shard_count = max(1, min(self._config.shard_count, len(task_ids)))
+        return [task_ids[i::shard_count] for i in range(shard_count)]
+
     async def start(self):
         """启动客户端任务"""
-        if self._worker_task is None or self._worker_task.done():
+        if not any(not task.done() for task in self._worker_tasks):
             self._stop_event.clear()
-            self._worker_task = asyncio.create_task(self._rsocket_worker())
-            logging.info("[DanmakuClient] DanmakuClient 已启动任务")
+            self._active_shards.clear()
+            self._tick_timer.start()
+            if self._config.replay_path:
+                self._worker_tasks = [asyncio.create_task(self._replay_worker())]
+                logging.info(f"[DanmakuClient] 从抓包文件回放: {self._config.replay_path}")
+                return
+            if self._config.capture_dir:
+                self._capture = CaptureWriter(
+                    self._config.capture_dir, self._config.capture_max_bytes, self._config.capture_compress
+                )
+            shards = list(enumerate(self.shards))
+            if self._config.shard_per_socket:
+                # 每个分片独占一条 websocket，各自重连
+                groups = [[shard] for shard in shards]
+            else:
+                # 所有分片复用一条 websocket，每个分片一个 RSocket 通道
+                groups = [shards]
+            self._worker_tasks = [asyncio.create_task(self._rsocket_worker(group)) for group in groups]
+            logging.info(f"[DanmakuClient] DanmakuClient 已启动任务，分片数: {len(shards)}")
 
     async def stop(self):
         """停止客户端并清理资源"""
-        if self._worker_task:
+        if self._worker_tasks:
             logging.info("[DanmakuClient] 正在停止 DanmakuClient...")
             self._stop_event.set()  # 通知 worker 停止
-            try:
-                await asyncio.wait_for(self._worker_task, timeout=5.0)
-            except asyncio.TimeoutError:
-                self._worker_task.cancel()
-            self._worker_task = None
-            self.status_changed.emit("已断开")
+            _, pending = await asyncio.wait(self._worker_tasks, timeout=5.0)
+            for task in pending:
+                task.cancel()
+            self._worker_tasks = []
+            self._active_shards.clear()
+            self._subscribers.clear()
+            self._tick_timer.stop()
+            self._buffer.clear()
+            if self._capture is not None:
+                capture, self._capture = self._capture, None
+                await asyncio.to_thread(capture.close)
+            await self._connection.close()
+            self._emit_status("已断开")
             logging.info("[DanmakuClient] DanmakuClient 已停止")
 
-    async def _rsocket_worker(self):
-        """核心连接循环"""
+    def _emit_status(self, status: str):
+        """发送状态文本，有丢弃时附带丢弃计数"""
+        self._status = status
+        self._reported_dropped = self._dropped_count
+        if self._dropped_count:
+            status = f"{status} | 已丢弃 {self._dropped_count} 条"
+        self.status_changed.emit(status)
+
+    def _is_valid(self, msg_dto: ResponseMessageDto) -> bool:
+        """触发延迟解码并校验类型，解析失败的弹幕和重连后的重放弹幕直接丢弃"""
+        try:
+            if msg_dto.type != "DANMU":
+                msg_dto.trace.drop("not_danmu")
+                return False
+            if self._dedup is not None and self._is_replayed(msg_dto):
+                msg_dto.trace.drop("replayed")
+                return False
+            return True
+        except Exception as e:
+            ex = DanmakuClientException(e)
+            logging.error(f"解析弹幕数据失败: {ex}")
+            msg_dto.trace.drop("parse_error")
+            return False
+
+    def _is_replayed(self, msg_dto: ResponseMessageDto) -> bool:
+        """带服务端 id 的消息始终去重；没有 id 的只记录，仅在重新订阅后的重放窗口内按内容判定"""
+        key = msg_dto.dedup_key
+        if msg_dto.has_server_id or time.monotonic() < self._replay_until:
+            return self._dedup.seen(key)
+        self._dedup.add(key)
+        return False
+
+    def _mark_subscribed(self, index: int):
+        """分片再次订阅时中继可能重放断线前的消息，打开重放窗口"""
+        if index in self._subscribed_shards:
+            self._replay_until = time.monotonic() + self._config.dedup_replay_window
+        self._subscribed_shards.add(index)
+
+    def capture(self, raw: bytes):
+        if self._capture is not None:
+            self._capture.write(raw, time.time())
+
+    def push_danmu(self, msg_dto: ResponseMessageDto):
+        """由订阅者调用：批量模式下放入缓冲区，否则立即逐条发出"""
+        record_received()
+        if not self.batch_mode:
+            if self._is_valid(msg_dto):
+                self.danmu_received.emit(msg_dto)
+            return
+        if len(self._buffer) >= self._config.buffer_size:
+            self._buffer.popleft().trace.drop("buffer_full")
+            self._dropped_count += 1
+        self._buffer.append(msg_dto)
+
+    def _on_tick(self):
+        self._flush_batch()
+        self._replenish_credits()
+
+    def _replenish_credits(self):
+        if not self._subscribers:
+            return
+        window = self.credit_share
+        for subscriber in list(self._subscribers):
+            subscriber.replenish(window)
+
+    def _flush_batch(self):
+        """每个周期最多发出 max_batch_size 条弹幕"""
+        if self._buffer:
+            size = min(len(self._buffer), self._config.max_batch_size)
+            batch = [self._buffer.popleft() for _ in range(size)]
+            batch = [msg_dto for msg_dto in batch if self._is_valid(msg_dto)]
+            if batch:
+                self.danmu_batch_received.emit(batch)
+        if self._dropped_count != self._reported_dropped:
+            logging.warning(f"[DanmakuClient] 缓冲区已满，累计丢弃 {self._dropped_count} 条弹幕")
+            self._emit_status(self._status)
+
+    def _emit_shard_status(self):
+        total = len(self.shards)
+        if not self._active_shards:
+            self._emit_status("正在连接...")
+            return
+        status = "已连接" if total == 1 else f"已连接 (分片 {len(self._active_shards)}/{total})"
+        if self._connection.reconnect_count:
+            status += f" | 重连耗时 {self._connection.last_reconnect_gap:.1f}s"
+        self._emit_status(status)
+
+    async def _replay_worker(self):
+        """离线回放：抓包记录经由 InternalSubscriber.on_next 进入与网络接收相同的处理路径"""
+        try:
+            source = ReplaySource(self._config.replay_path, self._config.replay_speed)
+            speed = f"{self._config.replay_speed}x" if self._config.replay_speed > 0 else "全速"
+            self._emit_status(f"回放中 ({speed})")
+            await source.run(InternalSubscriber(Event(), self), self._stop_event)
+            self._emit_status(f"回放结束，共 {source.replayed} 条")
+        except Exception as e:
+            ex = DanmakuClientException(f"回放失败: {e}")
+            logging.error(ex)
+            self._emit_status("回放异常")
+
+    async def _rsocket_worker(self, shards: list[tuple[int, list[str]]]):
+        """核心连接循环：维护一条 websocket，并在其上为每个分片运行独立的通道"""
+        backoff = self._connection.new_backoff()
         while not self._stop_event.is_set():
+            await backoff.wait(self._stop_event)
+            if self._stop_event.is_set():
+                break
+            endpoint = self._connection.best_endpoint()
             try:
-                self.status_changed.emit("正在连接...")
-                async with aiohttp.ClientSession() as session:
-                    async with session.ws_connect(self._config.websocket_url) as websocket:
-                        transport = TransportAioHttpClient(websocket=websocket)
-                        async with RSocketClient(
-                                single_transport_provider(transport),
-                                keep_alive_period=timedelta(seconds=30),
-                                max_lifetime_period=timedelta(days=1)
-                        ) as client:
-                            self.status_changed.emit("已连接")
-
-                            # 通道建立逻辑
-                            channel_completion_event = Event()
-
-                            async def generator():
-                                yield Payload(data=json.dumps(self.subscribe_data["data"]).encode()), False
-                                # 等待停止信号或频道结束
-                                await self._stop_event.wait()
-
-                            stream = StreamFromAsyncGenerator(generator)
-                            requested = client.request_channel(Payload(), stream)
-
-                            # 传入自身用于回调
-                            subscriber = InternalSubscriber(channel_completion_event, self)
-                            requested.subscribe(subscriber)
-
-                            # 持续运行直到事件触发
-                            await asyncio.wait(
-                                [asyncio.create_task(channel_completion_event.wait()),
-                                 asyncio.create_task(self._stop_event.wait())],
-                                return_when=asyncio.FIRST_COMPLETED
-                            )
+                self._emit_shard_status()
+                async with self._connection.connect(endpoint, backoff) as websocket:
+                    transport = TransportAioHttpClient(websocket=websocket)
+                    async with RSocketClient(
+                            single_transport_provider(transport),
+                            keep_alive_period=timedelta(seconds=30),
+                            max_lifetime_period=timedelta(days=1)
+                    ) as client:
+                        channel_tasks = [
+                            asyncio.create_task(self._channel_worker(client, websocket, index, task_ids))
+                            for index, task_ids in shards
+                        ]
+                        # 持续运行直到停止，或全部通道因连接断开而退出
+                        stop_task = asyncio.create_task(self._stop_event.wait())
+                        channels = asyncio.gather(*channel_tasks, return_exceptions=True)
+                        await asyncio.wait([stop_task, channels], return_when=asyncio.FIRST_COMPLETED)
+                        stop_task.cancel()
+                        for task in channel_tasks:
+                            task.cancel()
+                        await channels
 
             except Exception as e:
-                ex = RsocketClientException(e)
+                ex = RsocketClientException(f"{endpoint.url}: {e}")
                 logging.error(f"连接异常： {ex}")
-                self.status_changed.emit("连接异常，重试中...")
-                await asyncio.sleep(5)  # 失败重试间隔
+                self._emit_status("连接异常，重试中...")
+            finally:
+                for index, _ in shards:
+                    self._active_shards.discard(index)
+
+    async def _channel_worker(self, client: RSocketClient, websocket, index: int, task_ids: list[str]):
+        """单个分片的订阅通道，通道结束但连接仍在时独立重新订阅，不影响其它分片"""
+        backoff = self._connection.new_backoff()
+        subscribe_payload = Payload(data=json.dumps({"taskIds": task_ids, "cmd": "SUBSCRIBE"}).encode())
+        while not self._stop_event.is_set() and not websocket.closed:
+            await backoff.wait(self._stop_event)
+            if self._stop_event.is_set():
+                break
+            channel_completion_event = Event()
+
+            async def generator():
+                yield subscribe_payload, False
+                # 等待停止信号或频道结束
+                await wait_first(self._stop_event, channel_completion_event)
+
+            stream = StreamFromAsyncGenerator(generator)
+            # 初始信用随 REQUEST_CHANNEL 帧一起发送，之后按消费情况补充
+            initial_window = self.credit_share
+            requested = client.request_channel(Payload(), stream).initial_request_n(initial_window)
+
+            # 传入自身用于回调
+            subscriber = InternalSubscriber(channel_completion_event, self, CreditController(initial_window))
+            requested.subscribe(subscriber)
+            self._subscribers.add(subscriber)
+            backoff.mark_connected()
+            self._mark_subscribed(index)
+            self._active_shards.add(index)
+            self._emit_shard_status()
+
+            await wait_first(channel_completion_event, self._stop_event)
+            self._subscribers.discard(subscriber)
+            self._active_shards.discard(index)
+            backoff.mark_disconnected()
+            if not self._stop_event.is_set():
+                logging.warning(f"[DanmakuClient] 分片 {index} 的订阅通道已结束，准备重新订阅")
+                self._emit_shard_status()
 
 
 # 内部订阅者类
@@ -106,23 +347,38 @@ from reactivestreams.subscription import Subscription
 
 
 class InternalSubscriber(Subscriber):
-    def __init__(self, completion_event, client: DanmakuClient) -> None:
+    def __init__(self, completion_event, client: DanmakuClient, credits: CreditController | None = None) -> None:
         super().__init__()
         self._completion_event = completion_event
         self._client = client
+        self._credits = credits
+        self._subscription: Subscription | None = None
+
+    @property
+    def credits(self) -> CreditController | None:
+        return self._credits
 
     def on_subscribe(self, subscription: Subscription):
-        subscription.request(0x7FFFFFFF)
+        # 初始信用已由 REQUEST_CHANNEL 帧携带，此处只保存订阅，后续按需补充
+        self._subscription = subscription
+        if self._credits is None:
+            subscription.request(0x7FFFFFFF)
+
+    def replenish(self, window: int):
+        if self._subscription is None or self._credits is None:
+            return
+        n = self._credits.top_up(window)
+        if n:
+            self._subscription.request(n)
 
     def on_next(self, value: Payload, is_complete=False):
-        try:
-            res = json.loads(value.data)
-            if isinstance(res, dict) and res.get('type') == "DANMU":
-                msg_dto: ResponseMessageDto = ResponseMessageDto(res)
-                self._client.danmu_received.emit(msg_dto)
-        except Exception as e:
-            ex = DanmakuClientException(e)
-            logging.error(f"解析弹幕数据失败: {ex}")
+        if self._credits is not None:
+            self._credits.on_received()
+        if value.data:
+            self._client.capture(value.data)
+        # 非弹幕帧在字节层面直接丢弃，弹幕帧延迟到消费时才解码
+        if value.data and is_danmu_frame(value.data):
+            self._client.push_danmu(ResponseMessageDto(value.data))
 
         if is_complete:
             self._completion_event.set()
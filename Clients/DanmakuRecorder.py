@@ -0,0 +1,164 @@
+import asyncio
+import gzip
+import logging
+import queue
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import suppress
+from pathlib import Path
+
+from rsocket.payload import Payload
+
+from Exceptions import DanmakuClientException
+
+# 每条记录：接收时间戳（秒，float64）+ 负载长度（uint32），小端，后跟原始负载
+_RECORD_HEADER = struct.Struct("<dI")
+CAPTURE_SUFFIX = ".cap"
+
+
+class CaptureWriter:
+    """将收到的原始负载追加写入长度前缀格式的抓包文件，按大小滚动，可选 gzip 压缩。
+
+    write 在事件循环线程上调用，只把记录放入队列；文件写入与 gzip 压缩在独立的写线程中按批完成，
+    磁盘变慢或压缩耗时不会阻塞接收。close 会等待队列写完，应放到线程中调用。
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 64 * 1024 * 1024, compress: bool = False):
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+        self._compress = compress
+        self._file = None
+        self._written = 0
+        self._sequence = 0
+        self._records = 0
+        self._queue: queue.SimpleQueue[tuple[bytes, float] | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def records(self) -> int:
+        return self._records
+
+    def _open_next(self):
+        self._close_file()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._sequence += 1
+        name = f"danmaku-{time.strftime('%Y%m%d-%H%M%S')}-{self._sequence:03d}{CAPTURE_SUFFIX}"
+        if self._compress:
+            self._file = gzip.open(self._directory / f"{name}.gz", "ab")
+        else:
+            self._file = open(self._directory / name, "ab")
+        self._written = 0
+        logging.info(f"[DanmakuClient] 抓包写入: {self._file.name}")
+
+    def write(self, raw: bytes, received_at: float):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="CaptureWriter", daemon=True)
+            self._thread.start()
+        self._queue.put((raw, received_at))
+        self._records += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # 一次取走队列中积压的全部记录
+            with suppress(queue.Empty):
+                while True:
+                    batch.append(self._queue.get_nowait())
+            for record in batch:
+                if record is None:
+                    self._close_file()
+                    return
+                try:
+                    self._write_record(*record)
+                except OSError as e:
+                    logging.error(f"[DanmakuClient] 抓包写入失败: {e}")
+
+    def _write_record(self, raw: bytes, received_at: float):
+        if self._file is None or self._written >= self._max_bytes:
+            self._open_next()
+        self._file.write(_RECORD_HEADER.pack(received_at, len(raw)))
+        self._file.write(raw)
+        self._written += _RECORD_HEADER.size + len(raw)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """写完队列中的记录后关闭文件"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._close_file()
+
+
+def capture_files(path: str | Path) -> list[Path]:
+    """路径为目录时按文件名顺序返回其中的全部抓包文件"""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.name.endswith((CAPTURE_SUFFIX, f"{CAPTURE_SUFFIX}.gz")))
+    if not path.exists():
+        raise DanmakuClientException(f"抓包文件不存在: {path}")
+    return [path]
+
+
+def read_capture(path: Path) -> Iterator[tuple[float, bytes]]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rb") as f:
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                # 文件末尾或写入中断留下的半条记录
+                return
+            received_at, length = _RECORD_HEADER.unpack(header)
+            raw = f.read(length)
+            if len(raw) < length:
+                return
+            yield received_at, raw
+
+
+class ReplaySource:
+    """读取抓包文件并按原始时间间隔回放。speed 为倍速，0 表示不等待尽快回放"""
+    _YIELD_EVERY = 256
+
+    def __init__(self, path: str | Path, speed: float = 1.0):
+        if speed < 0:
+            raise DanmakuClientException("回放倍速不能为负数")
+        self._files = capture_files(path)
+        self._speed = speed
+        self._replayed = 0
+
+    @property
+    def replayed(self) -> int:
+        return self._replayed
+
+    def records(self) -> Iterator[tuple[float, bytes]]:
+        for path in self._files:
+            yield from read_capture(path)
+
+    async def run(self, subscriber, stop_event: asyncio.Event):
+        """将记录逐条交给订阅者的 on_next，与网络接收走同一条路径"""
+        first_ts = None
+        start = time.monotonic()
+        for received_at, raw in self.records():
+            if stop_event.is_set():
+                break
+            if self._speed > 0:
+                if first_ts is None:
+                    first_ts = received_at
+                delay = (received_at - first_ts) / self._speed - (time.monotonic() - start)
+                if delay > 0:
+                    with suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(stop_event.wait(), timeout=delay)
+                    if stop_event.is_set():
+                        break
+            elif self._replayed % self._YIELD_EVERY == 0:
+                # 全速回放时定期让出事件循环，避免阻塞 GUI
+                await asyncio.sleep(0)
+            subscriber.on_next(Payload(data=raw))
+            self._replayed += 1
+        subscriber.on_complete()
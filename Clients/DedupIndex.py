@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+
+from utils.Metrics import dedup_lookups
+
+
+class DedupIndex:
+    """按首次出现时间淘汰的有界索引，用于过滤重连后中继重放的弹幕。
+
+    命中不会刷新时间，每个键最多保留 window 秒；只保存键的哈希值，内存上限由 max_entries 决定。
+    """
+
+    def __init__(self, max_entries: int = 4096, window: float = 60.0):
+        self._max_entries = max_entries
+        self._window = window
+        self._entries: OrderedDict[int, float] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        entries = self._entries
+        while entries:
+            key, seen_at = next(iter(entries.items()))
+            if now - seen_at < self._window:
+                break
+            del entries[key]
+
+    def _insert(self, digest: int, now: float):
+        self._entries[digest] = now
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def add(self, key: tuple):
+        """只记录键、不做判断；已存在的键保留首次出现时间"""
+        now = time.monotonic()
+        self._expire(now)
+        digest = hash(key)
+        if digest not in self._entries:
+            self._insert(digest, now)
+
+    def seen(self, key: tuple) -> bool:
+        """键已在窗口内出现过返回 True，否则记录该键并返回 False"""
+        now = time.monotonic()
+        self._expire(now)
+        digest = hash(key)
+        if digest in self._entries:
+            self._hits += 1
+            dedup_lookups.inc("hit")
+            return True
+        self._insert(digest, now)
+        self._misses += 1
+        dedup_lookups.inc("miss")
+        return False
+
+    def clear(self):
+        self._entries.clear()
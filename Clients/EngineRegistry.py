@@ -0,0 +1,69 @@
+import importlib
+import logging
+
+from Exceptions import TTSClientException
+
+_DEFAULT_CARD = "Gui.ManagerCard:OtherTTSManagerCard"
+
+
+def _import(path: str):
+    """按 "模块:属性" 导入对象"""
+    module_name, sep, attr = path.partition(":")
+    if not sep or not module_name or not attr:
+        raise TTSClientException(f"无效的引擎路径: {path}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class EngineEntry:
+    """注册表中的一个 TTS 引擎。客户端类与管理面板类以 "模块:类名" 记录，直到第一次使用时才导入"""
+
+    def __init__(self, name: str, title: str, client: str, card: str = _DEFAULT_CARD):
+        self._name = name
+        self._title = title
+        self._client = client
+        self._card = card
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def title(self) -> str:
+        return self._title
+
+    def load_client(self) -> type:
+        from .TTSClient import TTSClient
+        client_cls = _import(self._client)
+        if not (isinstance(client_cls, type) and issubclass(client_cls, TTSClient)):
+            raise TTSClientException(f"引擎 {self._name} 的客户端 {self._client} 不是 TTSClient 子类")
+        return client_cls
+
+    def load_card(self) -> type:
+        return _import(self._card)
+
+
+_engines: dict[str, EngineEntry] = {}
+
+
+def register_engine(name: str, title: str, client: str, card: str = _DEFAULT_CARD):
+    """注册一个 TTS 引擎，同名引擎会被覆盖；注册本身不导入任何模块"""
+    if name in _engines:
+        logging.warning(f"[TTS] 引擎 {name} 已注册，将被覆盖")
+    _engines[name] = EngineEntry(name, title, client, card)
+
+
+def engines() -> list[EngineEntry]:
+    """按注册顺序返回所有引擎"""
+    return list(_engines.values())
+
+
+def get_engine(name: str) -> EngineEntry:
+    if name not in _engines:
+        raise TTSClientException(f"未注册的 TTS 引擎: {name}")
+    return _engines[name]
+
+
+register_engine("gpt-sovits", "GPT-SoVITS", "Clients.TTSClient:AITTSClient", "Gui.ManagerCard:WeightsManagerCard")
+register_engine("edge-tts", "Edge-TTS (微软)", "Clients.TTSClient:EdgeTTSClient", "Gui.ManagerCard:EdgeTTSManagerCard")
+register_engine("offline", "离线合成", "Clients.OfflineTTSClient:OfflineTTSClient",
+                "Gui.ManagerCard:OfflineTTSManagerCard")
@@ -0,0 +1,39 @@
+class CreditController:
+    """单个订阅通道的 reactive-streams 信用计数。
+
+    outstanding 为已向服务端授予但尚未收到的条数；补充信用时只补到目标窗口，
+    且缺口不足窗口一半时不发送 REQUEST_N，避免频繁的小帧。
+    """
+
+    def __init__(self, initial_window: int):
+        if initial_window < 1:
+            raise ValueError("信用窗口必须为正整数")
+        self._outstanding = initial_window
+        self._granted = initial_window
+        self._received = 0
+
+    @property
+    def outstanding(self) -> int:
+        return self._outstanding
+
+    @property
+    def granted(self) -> int:
+        return self._granted
+
+    @property
+    def received(self) -> int:
+        return self._received
+
+    def on_received(self):
+        self._received += 1
+        if self._outstanding > 0:
+            self._outstanding -= 1
+
+    def top_up(self, window: int) -> int:
+        """返回本次应请求的信用数，0 表示暂不请求"""
+        shortfall = window - self._outstanding
+        if shortfall <= 0 or shortfall < max(1, window // 2):
+            return 0
+        self._outstanding += shortfall
+        self._granted += shortfall
+        return shortfall
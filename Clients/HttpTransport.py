@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from enum import StrEnum
+from typing import Callable
+
+import aiohttp
+from yarl import URL
+
+from Exceptions import TransportException, CircuitOpenException
+from utils.Metrics import backend_errors
+
+# 视为后端暂时不可用、值得重试的状态码
+_RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+
+class CircuitState(StrEnum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后熔断，reset_timeout 秒后放行一个探测请求，成功则恢复"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._state = CircuitState.closed
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.open and time.monotonic() - self._opened_at >= self._reset_timeout:
+            return CircuitState.half_open
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CircuitState.closed:
+            return True
+        if state == CircuitState.half_open and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        """探测请求未得出结论（如被取消）时让出探测名额，下一个请求可以重新探测"""
+        self._probing = False
+
+    def record_success(self) -> bool:
+        """返回 True 表示熔断器由此恢复"""
+        recovered = self._state != CircuitState.closed
+        self._failures = 0
+        self._state = CircuitState.closed
+        self._probing = False
+        return recovered
+
+    def record_failure(self) -> bool:
+        """返回 True 表示熔断器由此打开"""
+        self._failures += 1
+        self._probing = False
+        if self._state == CircuitState.open or self._failures >= self._failure_threshold:
+            was_open = self._state == CircuitState.open
+            self._state = CircuitState.open
+            self._opened_at = time.monotonic()
+            return not was_open
+        return False
+
+
+class RetryBudget:
+    """令牌桶式重试预算：每个请求存入 ratio 个令牌，每次重试消耗一个，避免故障时重试放大流量"""
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 3.0, max_tokens: float = 20.0):
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens = min_tokens
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self):
+        self._tokens = min(self._tokens + self._ratio, self._max_tokens)
+
+    def withdraw(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class RequestStats:
+    """单个接口的调用统计：次数、失败、重试、延迟滑动平均"""
+    _ALPHA = 0.2
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latency: float | None = None
+        self.last_error = ""
+
+    def record(self, latency: float):
+        self.latency = latency if self.latency is None else self.latency + self._ALPHA * (latency - self.latency)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "latency": self.latency,
+            "last_error": self.last_error,
+        }
+
+
+class HttpTransport:
+    """TTS 后端调用的统一 HTTP 层：长连接池、分级超时、受预算约束的退避重试，以及按后端划分的熔断器"""
+
+    def __init__(self, connect_timeout: float = 3.0, read_timeout: float = 30.0, total_timeout: float = 60.0,
+                 max_retries: int = 2, retry_base_delay: float = 0.2, retry_budget_ratio: float = 0.2,
+                 breaker_threshold: int = 5, breaker_reset_timeout: float = 10.0, pool_size: int = 16,
+                 on_circuit_change: Callable[[str, CircuitState], None] | None = None):
+        self._timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout, sock_read=read_timeout)
+        # 流式响应持续时间不可预期，只限制连接与两次读之间的间隔
+        self._stream_timeout = aiohttp.ClientTimeout(total=None, connect=connect_timeout, sock_read=read_timeout)
+        self._max_retries = max_retries
+        self._retry_base_delay = retry_base_delay
+        self._budget = RetryBudget(retry_budget_ratio)
+        self._breaker_threshold = breaker_threshold
+        self._breaker_reset_timeout = breaker_reset_timeout
+        self._pool_size = pool_size
+        self._on_circuit_change = on_circuit_change
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._stats: dict[str, RequestStats] = {}
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, limit_per_host=self._pool_size,
+                                             keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self._session
+
+    @property
+    def retry_budget(self) -> RetryBudget:
+        return self._budget
+
+    def breaker(self, url: str | URL) -> CircuitBreaker:
+        origin = str(URL(url).origin())
+        if origin not in self._breakers:
+            self._breakers[origin] = CircuitBreaker(self._breaker_threshold, self._breaker_reset_timeout)
+        return self._breakers[origin]
+
+    def available(self, url: str | URL) -> bool:
+        """后端未熔断（或已到探测时间）"""
+        return self.breaker(url).state != CircuitState.open
+
+    def stats(self) -> dict[str, dict]:
+        """按 "方法 后端/接口" 汇总的调用统计"""
+        return {key: stat.as_dict() for key, stat in self._stats.items()}
+
+    def _stat(self, method: str, url: URL) -> RequestStats:
+        key = f"{method} {url.origin()}{url.path}"
+        if key not in self._stats:
+            self._stats[key] = RequestStats()
+        return self._stats[key]
+
+    def _notify(self, url: URL, state: CircuitState):
+        logging.warning(f"[TTS][HTTP] 后端 {url.origin()} 熔断器状态: {state}")
+        if self._on_circuit_change is not None:
+            self._on_circuit_change(str(url.origin()), state)
+
+    def _fail(self, url: URL, breaker: CircuitBreaker, stat: RequestStats, error: str):
+        stat.errors += 1
+        stat.last_error = error
+        backend_errors.inc(str(url.origin()))
+        if breaker.record_failure():
+            self._notify(url, CircuitState.open)
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str | URL, *, stream: bool = False, **kwargs):
+        """发出请求并返回响应。连接错误、超时和 502/503/504 在预算内退避重试；
+        熔断时直接抛出 CircuitOpenException，不发出请求。其他状态码交给调用方处理"""
+        url = URL(url)
+        breaker = self.breaker(url)
+        stat = self._stat(method, url)
+        self._budget.deposit()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                stat.rejected += 1
+                raise CircuitOpenException(f"后端 {url.origin()} 熔断中")
+            stat.requests += 1
+            start = time.perf_counter()
+            error = None
+            try:
+                resp = await self.session.request(method, url, timeout=self._stream_timeout if stream else self._timeout,
+                                                  **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+            except aiohttp.ClientError as e:
+                # 请求本身无法发出（URL、负载等问题），重试无意义，但同样计入失败以结束半开探测
+                self._fail(url, breaker, stat, f"{type(e).__name__}: {e}")
+                raise
+            except BaseException:
+                # 被取消：不计入失败，但必须让出探测名额，否则熔断器会一直停在半开状态
+                breaker.release_probe()
+                raise
+            else:
+                if resp.status not in _RETRYABLE_STATUS:
+                    stat.record(time.perf_counter() - start)
+                    if breaker.record_success():
+                        self._notify(url, CircuitState.closed)
+                    try:
+                        yield resp
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        # 读取响应体时断开或超时同样计入失败，但响应已交给调用方，不再重试
+                        self._fail(url, breaker, stat, f"{type(e).__name__}: {e}")
+                        raise
+                    finally:
+                        resp.release()
+                    return
+                error = f"HTTP {resp.status}"
+                resp.release()
+            self._fail(url, breaker, stat, error)
+            if attempt >= self._max_retries or not self._budget.withdraw():
+                raise TransportException(f"{method} {url} 失败: {error}")
+            attempt += 1
+            stat.retries += 1
+            await asyncio.sleep(random.uniform(0, self._retry_base_delay * 2 ** attempt))
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,44 @@
+import logging
+
+from aiohttp import web
+
+from utils.Metrics import MetricsRegistry, registry
+
+
+class MetricsServer:
+    """本地 HTTP 端点，GET /metrics 以 Prometheus 文本格式返回全部指标"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, metrics: MetricsRegistry = registry):
+        self._host = host
+        self._port = port
+        self._metrics = metrics
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self._host}:{self._port}/metrics"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self._metrics.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.add_routes([web.get("/metrics", self._handle)])
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self._host, self._port).start()
+        except OSError as e:
+            await runner.cleanup()
+            logging.error(f"[Metrics] 指标端点启动失败 ({self._host}:{self._port}): {e}")
+            return
+        self._runner = runner
+        logging.info(f"[Metrics] 指标端点: {self.url}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+        self._runner = None
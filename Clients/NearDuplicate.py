@@ -0,0 +1,122 @@
+import hashlib
+import re
+import time
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Callable
+
+from Models import TTSQueueItem
+
+# 连续重复的片段（单字或最多 4 字的短语）折叠为一次："哈哈哈哈" -> "哈"，"awslawsl" -> "awsl"
+_REPEAT_RUN = re.compile(r"(.{1,4}?)\1+")
+_SKETCH_BITS = 64
+_SHINGLE_SIZE = 2
+# 归一化后短于该长度的文本只做精确比较，SimHash 在极短文本上误判率过高
+_MIN_FUZZY_LENGTH = 4
+
+
+def normalize_text(text: str) -> str:
+    """全半角折叠、去除标点符号与空白、小写，并折叠重复片段"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(char for char in text if unicodedata.category(char)[0] not in "PSZC")
+    return _REPEAT_RUN.sub(r"\1", text)
+
+
+@lru_cache(maxsize=8192)
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(normalized: str) -> int:
+    """单字与字符 shingle 上的 64 位 SimHash，相似文本的汉明距离小。
+
+    弹幕很短，特征少，相近文本的距离通常在 8~16，无关文本在 32 上下。
+    """
+    shingles = list(normalized)
+    shingles += [normalized[i:i + _SHINGLE_SIZE] for i in range(len(normalized) - _SHINGLE_SIZE + 1)]
+    weights = [0] * _SKETCH_BITS
+    for shingle in shingles:
+        value = _shingle_hash(shingle)
+        for bit in range(_SKETCH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    sketch = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            sketch |= 1 << bit
+    return sketch
+
+
+class _Entry:
+    __slots__ = ("normalized", "sketch", "item", "added_at")
+
+    def __init__(self, normalized: str, sketch: int, item: TTSQueueItem, added_at: float):
+        self.normalized = normalized
+        self.sketch = sketch
+        self.item = item
+        self.added_at = added_at
+
+
+class NearDuplicateIndex:
+    """TTS 入队前的近似去重：比较排队中和最近已朗读的条目。
+
+    与仍在队列中的条目重复时合并计数；与已出队（正在合成或刚播放过）的条目重复时直接丢弃。
+    条目是否仍在排队由 is_pending 判断，不依赖条目是否持有合成任务。
+    """
+
+    def __init__(self, window: float = 30.0, max_distance: int = 10, max_entries: int = 256,
+                 on_merge: Callable[[TTSQueueItem], None] | None = None,
+                 is_pending: Callable[[TTSQueueItem], bool] | None = None):
+        self._window = window
+        self._on_merge = on_merge
+        self._is_pending = is_pending or (lambda item: item.task is None)
+        self._max_distance = max_distance
+        self._entries: deque[_Entry] = deque(maxlen=max_entries)
+        self._merged = 0
+        self._suppressed = 0
+
+    @property
+    def merged(self) -> int:
+        return self._merged
+
+    @property
+    def suppressed(self) -> int:
+        return self._suppressed
+
+    def _expire(self, now: float):
+        # 无论是否仍在排队，超过时间窗口即过期，之后的相同内容作为新条目入队
+        self._entries = deque((entry for entry in self._entries
+                               if not entry.item.evicted and now - entry.added_at < self._window),
+                              maxlen=self._entries.maxlen)
+
+    def _is_similar(self, entry: _Entry, normalized: str, sketch: int | None) -> bool:
+        if entry.normalized == normalized:
+            return True
+        if sketch is None or entry.sketch is None:
+            return False
+        return (entry.sketch ^ sketch).bit_count() <= self._max_distance
+
+    def offer(self, item: TTSQueueItem) -> bool:
+        """返回 True 表示 item 是新内容，调用方应将其入队；False 表示已被合并或丢弃"""
+        now = time.monotonic()
+        self._expire(now)
+        normalized = normalize_text(item.content)
+        if not normalized:
+            return True
+        sketch = simhash(normalized) if len(normalized) >= _MIN_FUZZY_LENGTH else None
+        for entry in reversed(self._entries):
+            if not self._is_similar(entry, normalized, sketch):
+                continue
+            if self._is_pending(entry.item):
+                entry.item.merge(item)
+                self._merged += 1
+                if self._on_merge is not None:
+                    self._on_merge(entry.item)
+            else:
+                self._suppressed += 1
+            return False
+        self._entries.append(_Entry(normalized, sketch, item, now))
+        return True
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import override
+
+from Exceptions import OfflineTTSClientException
+from Models import OfflineClientConfig, TTSQueueItem
+from utils.LocalSynthesizer import run_synthesizer
+from .TTSClient import TTSClient
+from .TextFrontend import normalize
+
+
+class OfflineTTSClient(TTSClient):
+    """完全离线的合成引擎：在进程池中调用本地命令行合成器。
+
+    合成与 WAV 整理都在子进程中进行，不占用 GIL 和 Qt 线程；工作进程数决定可同时合成的条数，
+    流水线深度至少与之相同，才能让所有进程都有活干。
+
+    各平台统一用 spawn 启动工作进程（Qt 进程中 fork 并不安全）。spawn 会在子进程中重新导入主模块，
+    main.py 因此只在 main() 内导入 Qt；以其它入口启动时，子进程载入的是该入口在顶层导入的模块。
+    子进程中已开始执行的合成命令无法从这里中断：取消合成只是不再等待结果，命令最长运行 synthTimeout 秒。
+    """
+
+    def __init__(self, conf_dict: dict, queue=None):
+        super().__init__(conf_dict, queue=queue)
+        self.offline_config = OfflineClientConfig(conf_dict)
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def workers(self) -> int:
+        return self.offline_config.workers
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.offline_config.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    @property
+    @override
+    def pipeline_depth(self) -> int:
+        return max(self.config.pipeline_depth, self.offline_config.workers)
+
+    @override
+    async def synthesize(self, item: TTSQueueItem) -> bytes | None:
+        text = normalize(item.text)
+        if not text:
+            return None
+        logging.info(f"[TTS][Offline] {text}")
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            audio_data = await loop.run_in_executor(self.executor, run_synthesizer, self.offline_config.command,
+                                                    text, self.offline_config.synth_timeout)
+        except asyncio.CancelledError:
+            # 已排队未开始的任务随之取消；已在子进程中运行的命令会跑完，结果被丢弃
+            raise
+        except BrokenProcessPool as e:
+            # 工作进程异常退出后进程池不可再用，下次合成时重建
+            broken, self._executor = self._executor, None
+            if broken is not None:
+                broken.shutdown(wait=False, cancel_futures=True)
+            raise OfflineTTSClientException(f"离线合成进程池已损坏，将重建: {e}")
+        except Exception as e:
+            raise OfflineTTSClientException(f"离线合成失败: {e}")
+        self._record_ttfa(time.perf_counter() - start, "buffered")
+        return audio_data
+
+    @override
+    async def close(self):
+        await super().close()
+        if self._executor is not None:
+            # 不等待进行中的合成命令（最长 synthTimeout 秒后自行结束），已排队的直接取消；
+            # 之后再次合成时会新建进程池
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+from collections import deque
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtMultimedia import QAudio, QAudioSink, QMediaDevices
+
+from .AudioStream import WavFormat, PcmStream, parse_wav_header
+from Exceptions import TTSClientException
+
+
+class Clip:
+    """播放队列中的一段音频。数据以 memoryview 分块排队，排队时不做拼接拷贝；流式片段在输入结束前可以继续追加"""
+
+    def __init__(self, fmt: WavFormat, done: asyncio.Future):
+        self._format = fmt
+        self._buffers: deque[memoryview] = deque()
+        self._bytes = 0
+        self._closed = False
+        self._done = done
+
+    @property
+    def format(self) -> WavFormat:
+        return self._format
+
+    @property
+    def done(self) -> asyncio.Future:
+        """片段播放完毕（声卡已消费完其最后一个字节）时完成"""
+        return self._done
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def duration(self) -> float:
+        """已追加的音频总时长（秒）"""
+        return self._bytes / self._format.bytes_per_second
+
+    @property
+    def pending_bytes(self) -> int:
+        """尚未写入 sink 的字节数"""
+        return sum(len(buffer) for buffer in self._buffers)
+
+    def append(self, data: bytes | memoryview):
+        if data:
+            self._buffers.append(memoryview(data))
+            self._bytes += len(data)
+
+    def close(self):
+        self._closed = True
+
+
+class PlaybackEngine(QObject):
+    """基于单个长期存在的推模式 QAudioSink 的播放引擎。
+
+    片段首尾相接写入同一个 sink，中间没有重建播放器或重新探测容器的空档；
+    只有音频格式变化时才在前一段播完后重建 sink。播放完成通过 future 通知，
+    完成时刻由已写入字节数与 processedUSecs 推算，用单次定时器唤醒，不轮询播放状态。
+    """
+    _PUMP_INTERVAL_MS = 10
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sink: QAudioSink | None = None
+        self._device = None
+        self._format: WavFormat | None = None
+        self._volume = 1.0
+        self._clips: deque[Clip] = deque()
+        # 已全部写入 sink、等待播完的片段: (片段结束处的累计字节偏移, future)
+        self._draining: deque[tuple[int, asyncio.Future]] = deque()
+        self._written = 0
+        # 向流式片段追加数据的任务，保留引用以免被回收，停止时一并取消
+        self._feed_tasks: set[asyncio.Task] = set()
+        self._pump_timer = QTimer(self)
+        self._pump_timer.setInterval(self._PUMP_INTERVAL_MS)
+        self._pump_timer.timeout.connect(self._pump)
+        self._drain_timer = QTimer(self)
+        self._drain_timer.setSingleShot(True)
+        self._drain_timer.timeout.connect(self._check_drained)
+
+    @property
+    def volume(self) -> float:
+        return self._volume
+
+    def set_volume(self, volume: float):
+        self._volume = volume
+        if self._sink is not None:
+            self._sink.setVolume(volume)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._clips or self._draining)
+
+    @property
+    def pending_seconds(self) -> float:
+        """尚未播完的音频时长（秒）：未写入 sink 的数据加上声卡缓冲中未播放的部分。流式片段只计已到达的数据"""
+        seconds = sum(clip.pending_bytes / clip.format.bytes_per_second for clip in self._clips)
+        if self._sink is not None:
+            seconds += max(self._written - self._processed_bytes(), 0) / self._format.bytes_per_second
+        return seconds
+
+    def _new_clip(self, fmt: WavFormat) -> Clip:
+        clip = Clip(fmt, asyncio.get_running_loop().create_future())
+        self._clips.append(clip)
+        return clip
+
+    def enqueue(self, audio_data: bytes) -> Clip:
+        """排入一段完整的 WAV 音频，返回的片段在播完时其 done 完成"""
+        parsed = parse_wav_header(audio_data)
+        if parsed is None:
+            raise TTSClientException("WAV 数据不完整")
+        fmt, offset = parsed
+        clip = self._new_clip(fmt)
+        clip.append(memoryview(audio_data)[offset:])
+        clip.close()
+        self._pump()
+        return clip
+
+    async def enqueue_stream(self, stream: PcmStream) -> Clip | None:
+        """等到流的格式可用后排入片段，之后数据块到达即追加。返回时片段已在队列中"""
+        fmt = await stream.wait_format()
+        if fmt is None:
+            return None
+        clip = self._new_clip(fmt)
+        task = asyncio.create_task(self._feed_stream(stream, clip))
+        self._feed_tasks.add(task)
+        task.add_done_callback(self._on_feed_done)
+        return clip
+
+    def _on_feed_done(self, task: asyncio.Task):
+        self._feed_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"[TTS] 流式音频读取失败: {task.exception()}")
+
+    async def _feed_stream(self, stream: PcmStream, clip: Clip):
+        try:
+            async for chunk in stream.chunks():
+                clip.append(chunk)
+                self._pump()
+        finally:
+            clip.close()
+            self._pump()
+
+    def _open_sink(self, fmt: WavFormat):
+        self._close_sink()
+        self._format = fmt
+        self._sink = QAudioSink(QMediaDevices.defaultAudioOutput(), fmt.to_qt(), self)
+        self._sink.setVolume(self._volume)
+        self._sink.stateChanged.connect(self._on_state_changed)
+        self._device = self._sink.start()
+        self._written = 0
+
+    def _close_sink(self):
+        if self._sink is not None:
+            self._sink.stop()
+            self._sink.deleteLater()
+        self._sink = None
+        self._device = None
+
+    def _pump(self):
+        while self._clips:
+            clip = self._clips[0]
+            if clip.done.done():
+                # 播放前已被取消
+                self._clips.popleft()
+                continue
+            if self._sink is None or clip.format != self._format:
+                if self._draining:
+                    # 格式变化，需等前一段播完再重建 sink
+                    break
+                self._open_sink(clip.format)
+            free = self._sink.bytesFree()
+            while clip._buffers and free > 0:
+                head = clip._buffers[0]
+                # QIODevice.write 只接受 bytes，每次只拷贝 sink 当前能容纳的部分
+                written = self._device.write(head[:free].tobytes())
+                if written <= 0:
+                    break
+                self._written += written
+                free -= written
+                if written >= len(head):
+                    clip._buffers.popleft()
+                else:
+                    clip._buffers[0] = head[written:]
+            if clip._buffers or not clip.closed:
+                break
+            # 片段已全部写入，紧接着写下一段，不留空档
+            self._clips.popleft()
+            self._draining.append((self._written, clip.done))
+            self._schedule_drain_check()
+        pending = any(clip._buffers for clip in self._clips)
+        if pending and not self._pump_timer.isActive():
+            self._pump_timer.start()
+        elif not pending:
+            self._pump_timer.stop()
+
+    def _processed_bytes(self) -> int:
+        if self._sink is None:
+            return self._written
+        return self._sink.processedUSecs() * self._format.bytes_per_second // 1_000_000
+
+    def _schedule_drain_check(self):
+        if not self._draining or self._drain_timer.isActive():
+            return
+        end, _ = self._draining[0]
+        remaining = max(end - self._processed_bytes(), 0)
+        self._drain_timer.start(remaining * 1000 // self._format.bytes_per_second)
+
+    def _check_drained(self):
+        processed = self._processed_bytes()
+        while self._draining and self._draining[0][0] <= processed:
+            _, done = self._draining.popleft()
+            if not done.done():
+                done.set_result(None)
+        self._schedule_drain_check()
+        # 等待格式切换的片段此时可以开始
+        if self._clips and not self._draining:
+            self._pump()
+
+    def _on_state_changed(self, state):
+        # 声卡缓冲耗尽：已写入的数据全部播完
+        if state == QAudio.State.IdleState:
+            self._drain_timer.stop()
+            while self._draining:
+                _, done = self._draining.popleft()
+                if not done.done():
+                    done.set_result(None)
+            if self._clips:
+                self._pump()
+
+    def stop(self):
+        """停止播放并取消所有排队中的片段"""
+        self._pump_timer.stop()
+        self._drain_timer.stop()
+        for task in self._feed_tasks:
+            task.cancel()
+        for clip in self._clips:
+            clip.done.cancel()
+        for _, done in self._draining:
+            done.cancel()
+        self._clips.clear()
+        self._draining.clear()
+        self._close_sink()
+        logging.debug("[TTS] 播放引擎已停止")
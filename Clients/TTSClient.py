@@ -1,66 +1,89 @@
 import asyncio
 import logging
-import re
-from collections import defaultdict
+import random
+import statistics
+import time
+from collections import defaultdict, deque
 from contextlib import suppress
+from functools import partial
 from typing import override
 
-import aiohttp
-from PySide6.QtCore import QUrl, QBuffer, QObject, QIODeviceBase, QByteArray
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+from PySide6.QtCore import QObject
 from yarl import URL
 
-from Exceptions import AITTSClientException
+from Exceptions import AITTSClientException, TTSClientException
 from Exceptions.TTSClients import EdgeTTSClientException
-from Models import TTSClientConfig, AIClientConfig, AIWeightsPaths
+from Models import TTSClientConfig, AIClientConfig, AIWeightsPaths, TTSQueueItem, PromptProfile, TTSRequestSpec
+from utils.Metrics import Stage, tts_enqueued, model_switch_seconds, warm_up_seconds
+from utils.TimeStretch import time_stretch
+from .AdmissionControl import AdmissionController, AdmissionDecision
+from .AudioCache import AudioCache, cache_key
+from .BackendPool import BackendPool, Backend
+from .HttpTransport import HttpTransport, CircuitState
+from .AudioStream import WavFormat, build_wav, parse_wav_header, PcmStream
+from .NearDuplicate import NearDuplicateIndex
+from .PlaybackEngine import PlaybackEngine, Clip
+from .TextFrontend import prepare, chunk
+from .TTSScheduler import TTSScheduler, EvictionPolicy
+from .WeightsIndex import WeightsIndex
+
+
+def _summarize(series: dict[str, deque[float]]) -> dict[str, dict[str, float]]:
+    stats = {}
+    for name, samples in series.items():
+        if samples:
+            stats[name] = {"count": len(samples), "last": samples[-1], "mean": statistics.fmean(samples)}
+    return stats
 
 
 class TTSClient(QObject):
-    def __init__(self, config: dict, is_test: bool = True, queue=None):
+    def __init__(self, config: dict, is_test: bool = True, queue: TTSScheduler | None = None):
         super().__init__()
         self.config: TTSClientConfig = TTSClientConfig(config)
-        self.tts_queue = asyncio.Queue() if queue is None else queue
-        self._session = None
+        self.tts_queue = TTSScheduler(ttl=self.config.message_ttl) if queue is None else queue
         self._running = False
         self._worker_task = None
         self._is_test: bool = is_test
         self.worker_close_task = None
         self._client_close_task = None
 
-        # 初始化 Qt 播放器
-        self.player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.player.setAudioOutput(self.audio_output)
-        self.audio_output.setVolume(1.0)
+        # 单个长期存在的播放引擎，片段首尾相接播放
+        self._engine = PlaybackEngine(self)
+        # 流式音频的变速任务
+        self._stretch_tasks: set[asyncio.Task] = set()
 
-        self._q_data = None
-        self._q_buffer = None
+        # 合成流水线：已出队、正在合成或已合成待播放的条目，按入队顺序排列
+        self._pipeline: deque[TTSQueueItem] = deque()
+        self._pipeline_changed = asyncio.Event()
+        self._near_duplicates = NearDuplicateIndex(self.config.fuzzy_dedup_window, self.config.fuzzy_dedup_distance,
+                                                   on_merge=self.tts_queue.reprioritize,
+                                                   is_pending=self.tts_queue.__contains__)
+
+        # 按实测合成耗时与音频时长做准入控制，并据此推算有效队列长度
+        self._admission = AdmissionController(self.config.latency_budget, self.config.admission_min_chars)
+
+        # 首个音频到达耗时（time-to-first-audio）统计
+        self._ttfa: dict[str, deque[float]] = {mode: deque(maxlen=100) for mode in ("buffered", "streaming", "chunked")}
 
     @property
     def not_test(self) -> 'TTSClient':
         self._is_test = False
         return self
 
-    async def _post_tts(self, target_url: URL, post_data: dict):
-        async with self._session.post(target_url, json=post_data) as resp:
-            if resp.status == 200:
-                logging.debug("[TTS]成功接收生成语音")
-                audio_data = await resp.read()
-                await self._play_audio(audio_data)
-            else:
-                err_text = await resp.text()
-                ex = AITTSClientException(f"服务返回错误 [{resp.status}]: {err_text}")
-                logging.error(ex)
-                # 如果后端报错，等 1 秒再继续，避免日志刷屏
-                await asyncio.sleep(1)
+    def _record_ttfa(self, seconds: float, mode: str):
+        self._ttfa[mode].append(seconds)
+        logging.info(f"[TTS] 首个音频到达耗时 ({mode}): {seconds * 1000:.0f}ms")
+
+    @property
+    def ttfa_stats(self) -> dict[str, dict[str, float]]:
+        """按缓冲/流式/分段三种模式统计最近 100 次的首个音频到达耗时（秒）"""
+        return _summarize(self._ttfa)
 
     def start(self):
         logging.info("[TTS] 启动 TTS 工作线程")
         if self._worker_task:
             logging.warning("[TTS] TTS 工作线程已在运行中")
             return
-        if not self._session:
-            self._session = aiohttp.ClientSession()
         self._running = True
         self._worker_task = asyncio.create_task(self.tts_worker())
 
@@ -72,139 +95,580 @@ class TTSClient(QObject):
             with suppress(asyncio.CancelledError):
                 await self._worker_task
         self._worker_task = None
+        while self._pipeline:
+            self._pipeline.popleft().evict("stopped")
+        for task in self._stretch_tasks:
+            task.cancel()
 
     async def close(self):
         await self.stop_worker()
-        if self._session:
-            await self._session.close()
-        self._session = None
-        if self._q_buffer:
-            self._q_buffer.close()
-            self._q_buffer.deleteLater()
-            self._q_buffer = None
-        self._q_data = None
-
-    async def _play_audio(self, audio_data: bytes):
-        if self._q_buffer:
-            self._q_buffer.close()
-            self._q_buffer.deleteLater()
-
-        self._q_data = QByteArray(audio_data)
-        self._q_buffer = QBuffer(self)
-        self._q_buffer.setData(self._q_data)
-
-        if self._q_buffer.open(QIODeviceBase.OpenModeFlag.ReadOnly):
-            self._q_buffer.seek(0)
-            self.player.setSourceDevice(self._q_buffer, QUrl("audio.wav"))
-
-            self.player.play()
-
-            # 刚 play() 时状态是 Stopped，必须给它一点时间跳变到 Playing
-            # 等待状态改变，或者等待一小段时间
-            retry_count = 0
-            while self.player.playbackState() != QMediaPlayer.PlaybackState.PlayingState and retry_count < 10:
-                await asyncio.sleep(0.05)
-                retry_count += 1
-
-            # 进入阻塞循环
-            while self.player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
-                await asyncio.sleep(0.1)
-        else:
-            logging.error("无法打开 QBuffer 进行读取")
 
-    def tts_queue_put(self, text: str):
-        if self.tts_queue.qsize() >= self.config.max_queue_size:
+    def stop_playback(self):
+        """立即停止当前播放并丢弃已排入引擎的片段"""
+        self._engine.stop()
+
+    def playback_rate(self, item: TTSQueueItem) -> float:
+        """按积压条数与该条已等待的时间计算播放倍速：超过阈值后线性加速到 max_playback_rate，积压消退后回到 1"""
+        max_rate = self.config.max_playback_rate
+        if max_rate <= 1.0:
+            return 1.0
+        pressure = 0.0
+        start, full = self.config.speed_up_backlog, self.capacity
+        if full > start:
+            pressure = (self.backlog - start) / (full - start)
+        wait_start, ttl = self.config.speed_up_wait, self.config.message_ttl
+        if ttl > wait_start and item.enqueued_at:
+            waited = time.monotonic() - item.enqueued_at
+            pressure = max(pressure, (waited - wait_start) / (ttl - wait_start))
+        pressure = min(max(pressure, 0.0), 1.0)
+        return round(1.0 + (max_rate - 1.0) * pressure, 2)
+
+    @staticmethod
+    async def _stretch_wav(audio_data: bytes, rate: float) -> bytes:
+        parsed = parse_wav_header(audio_data)
+        if parsed is None or parsed[0].sample_width != 2:
+            return audio_data
+        fmt, offset = parsed
+        pcm = await asyncio.to_thread(time_stretch, audio_data[offset:], fmt.channels, fmt.sample_rate, rate)
+        return build_wav(fmt, pcm)
+
+    async def _stretch_stream(self, source: PcmStream, fmt: WavFormat, rate: float) -> PcmStream:
+        """流式音频按块变速：每攒够约半秒在线程中处理一次，处理完即输出"""
+        stretched = PcmStream()
+        stretched.feed(build_wav(fmt, b""))
+        block_align = fmt.channels * fmt.sample_width
+        block = fmt.bytes_per_second // 2 // block_align * block_align
+
+        async def pump():
+            buffer = bytearray()
             try:
-                self.tts_queue.get_nowait()
-                self.tts_queue.task_done()
-            except asyncio.QueueEmpty:
-                pass
-        self.tts_queue.put_nowait(text)
+                async for chunk in source.chunks():
+                    buffer.extend(chunk)
+                    if len(buffer) >= block:
+                        data = bytes(buffer[:block])
+                        del buffer[:block]
+                        stretched.feed(await asyncio.to_thread(time_stretch, data, fmt.channels, fmt.sample_rate,
+                                                               rate))
+                usable = len(buffer) // block_align * block_align
+                if usable:
+                    stretched.feed(await asyncio.to_thread(time_stretch, bytes(buffer[:usable]), fmt.channels,
+                                                           fmt.sample_rate, rate))
+            finally:
+                stretched.finish()
+
+        task = asyncio.create_task(pump())
+        self._stretch_tasks.add(task)
+        task.add_done_callback(self._stretch_tasks.discard)
+        return stretched
+
+    async def _enqueue_playback(self, item: TTSQueueItem) -> Clip | None:
+        """把已就绪的条目排入播放引擎，返回其片段；合成失败或无音频时返回 None。
+        积压时按 playback_rate 变速，变速在线程中进行"""
+        rate = self.playback_rate(item)
+        if item.stream is not None:
+            stream = item.stream
+            if rate > 1.0:
+                fmt = await stream.wait_format()
+                if fmt is not None and fmt.sample_width == 2:
+                    stream = await self._stretch_stream(stream, fmt, rate)
+                    item.playback_rate = rate
+            logging.info(f"[TTS] 流式播放{f' (x{rate})' if rate > 1.0 else ''}: {item.text}")
+            return await self._engine.enqueue_stream(stream)
+        audio_data = item.task.result()
+        if not audio_data:
+            return None
+        logging.info(f"[TTS] 播放{f' (x{rate})' if rate > 1.0 else ''}: {item.text}")
+        try:
+            if rate > 1.0:
+                audio_data = await self._stretch_wav(audio_data, rate)
+                item.playback_rate = rate
+            return self._engine.enqueue(audio_data)
+        except TTSClientException as e:
+            logging.error(e)
+            return None
 
-    async def tts_worker(self):
-        """TTS 工作线程，子类必须实现"""
-        pass
+    @property
+    def backlog(self) -> int:
+        """等待播放的总条数：队列中未出队的加上流水线中尚未开始播放的"""
+        return self.tts_queue.qsize() + len(self._pipeline)
+
+    @property
+    def admission(self) -> AdmissionController:
+        return self._admission
+
+    @property
+    def capacity(self) -> int:
+        """有效队列长度：按实测延迟推算延迟预算内能播完的条数，尚无估计时为 max_queue_size"""
+        return self._admission.effective_queue_size(self.config.max_queue_size)
+
+    @property
+    def queue_headroom(self) -> int:
+        return max(self.capacity - self.backlog, 0)
+
+    def _discard(self, item: TTSQueueItem):
+        if item in self._pipeline:
+            self._pipeline.remove(item)
+            self._pipeline_changed.set()
+
+    def _pick_victim(self, policy: EvictionPolicy) -> TTSQueueItem | None:
+        victim = self.tts_queue.peek_victim(policy)
+        if not self._pipeline:
+            return victim
+        if policy == EvictionPolicy.random:
+            index = random.randrange(self.backlog)
+            return self._pipeline[index] if index < len(self._pipeline) else victim
+        candidates = list(self._pipeline) if victim is None else [*self._pipeline, victim]
+        if policy == EvictionPolicy.lowest:
+            return min(candidates, key=lambda item: item.score)
+        return min(candidates, key=lambda item: item.enqueued_at)
+
+    def _evict_one(self) -> bool:
+        """按配置的策略淘汰一条；若其已在合成，取消进行中的请求"""
+        victim = self._pick_victim(EvictionPolicy(self.config.eviction_policy))
+        if victim is None:
+            return False
+        if victim in self._pipeline:
+            self._discard(victim)
+        else:
+            self.tts_queue.remove(victim)
+        victim.evict("evicted")
+        return True
+
+    def _enforce_capacity(self):
+        capacity = self.capacity
+        while self.backlog > capacity:
+            if not self._evict_one():
+                break
+
+    def _backlog_chars(self) -> int:
+        return sum(len(item.text) for item in self.tts_queue.items()) + sum(len(item.text) for item in self._pipeline)
+
+    def _admit(self, item: TTSQueueItem, ahead_chars: int) -> bool:
+        """准入判断：预计开始播放过晚的拒绝，播放结束超出预算的截短"""
+        decision, allowed = self._admission.admit(len(item.text), ahead_chars, self._engine.pending_seconds)
+        if decision == AdmissionDecision.reject:
+            item.evict("admission")
+            return False
+        if decision == AdmissionDecision.truncate:
+            item.truncate(allowed)
+        return True
+
+    @property
+    def near_duplicates(self) -> NearDuplicateIndex:
+        return self._near_duplicates
+
+    def _put(self, item: TTSQueueItem):
+        self.tts_queue.put_nowait(item)
+        item.trace.mark(Stage.enqueued)
+        tts_enqueued.inc()
+
+    def tts_queue_put(self, text: str | TTSQueueItem):
+        item = text if isinstance(text, TTSQueueItem) else TTSQueueItem(text)
+        if not self._near_duplicates.offer(item):
+            item.trace.drop("duplicate")
+            return
+        if not self._admit(item, self._backlog_chars()):
+            return
+        # 先入队再淘汰，新条目本身也可能因分数最低被淘汰
+        self._put(item)
+        self._enforce_capacity()
+
+    def tts_queue_put_batch(self, texts: list[str | TTSQueueItem]):
+        """批量入队：先合并近似重复，整批入队后一次性淘汰到有效队列长度"""
+        ahead_chars = self._backlog_chars()
+        for text in texts:
+            item = text if isinstance(text, TTSQueueItem) else TTSQueueItem(text)
+            if not self._near_duplicates.offer(item):
+                item.trace.drop("duplicate")
+            elif self._admit(item, ahead_chars):
+                self._put(item)
+                ahead_chars += len(item.text)
+        self._enforce_capacity()
+
+    @property
+    def pipeline_depth(self) -> int:
+        """最多提前合成的条数，子类可按自身并行能力放宽"""
+        return self.config.pipeline_depth
 
+    def _ready(self) -> bool:
+        """是否可以开始合成，子类可覆盖（例如模型尚未载入时返回 False）"""
+        return True
 
-def get_name(full_name: str) -> str:
-    match = re.search(r".*(?=-)", full_name)
-    name = ""
-    if match:
-        name += match.group()
-    else:
-        raise AITTSClientException("模型名提取失败")
-    return name
+    async def synthesize(self, item: TTSQueueItem) -> bytes | None:
+        """合成一条文本并返回音频数据，子类实现"""
+        return None
+
+    async def _synthesize_item(self, item: TTSQueueItem) -> bytes | None:
+        start = time.perf_counter()
+        item.trace.mark(Stage.synthesis_start)
+        try:
+            audio_data = await self.synthesize(item)
+            item.trace.mark_once(Stage.first_byte)
+            item.trace.mark(Stage.synthesis_done)
+            if audio_data:
+                self._admission.observe_synthesis(len(item.text), time.perf_counter() - start)
+            return audio_data
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ex = TTSClientException(e)
+            logging.error(ex)
+            return None
+
+    def _on_clip_done(self, item: TTSQueueItem, clip: Clip, done: asyncio.Future):
+        if done.cancelled():
+            item.trace.drop("stopped")
+            return
+        item.trace.finish()
+        # 准入模型估计的是原速音频时长；按变速后的时长估计会在积压时偏低，反过来放大有效容量、压低倍速
+        self._admission.observe_clip(len(item.text), clip.duration * item.playback_rate)
+
+    async def _feed_pipeline(self):
+        """生产者：在流水线未满时持续出队并提前启动合成"""
+        while self._running:
+            if not self._ready():
+                await asyncio.sleep(1)
+                continue
+            if len(self._pipeline) >= self.pipeline_depth:
+                self._pipeline_changed.clear()
+                await self._pipeline_changed.wait()
+                continue
+            item: TTSQueueItem = await self.tts_queue.get()
+            item.task = asyncio.create_task(self._synthesize_item(item))
+            self._pipeline.append(item)
+            self._pipeline_changed.set()
+
+    @staticmethod
+    async def _wait_played(done: asyncio.Future):
+        """等待片段播完。用 asyncio.wait 而不是直接 await：stop_playback 取消片段时不会把 CancelledError
+        抛进工作协程，工作协程自身被取消时也不会连带取消片段"""
+        await asyncio.wait((done,))
+
+    async def tts_worker(self):
+        """TTS 工作线程：合成与播放流水线化，当前语音播放时后续条目已在合成"""
+        feeder = asyncio.create_task(self._feed_pipeline())
+        playing: asyncio.Future | None = None
+        try:
+            while self._running:
+                if not self._pipeline:
+                    self._pipeline_changed.clear()
+                    await self._pipeline_changed.wait()
+                    continue
+                item = self._pipeline[0]
+                await item.wait_ready()
+                if item.evicted:
+                    continue
+                self._discard(item)
+                clip = await self._enqueue_playback(item)
+                if clip is None:
+                    item.trace.drop("synthesis_failed")
+                    continue
+                # 无缝衔接时，上一段播完的时刻即本段开始播放的时刻
+                if playing is None or playing.done():
+                    item.trace.mark(Stage.playback_start)
+                else:
+                    playing.add_done_callback(lambda _, trace=item.trace: trace.mark(Stage.playback_start))
+                clip.done.add_done_callback(partial(self._on_clip_done, item, clip))
+                # 下一段在当前段播放期间排入引擎，实现无缝衔接；引擎中最多积压一段
+                if playing is not None:
+                    await self._wait_played(playing)
+                playing = clip.done
+            if playing is not None:
+                await self._wait_played(playing)
+        finally:
+            self._engine.stop()
+            feeder.cancel()
+            with suppress(asyncio.CancelledError):
+                await feeder
 
 
 class AITTSClient(TTSClient):
+    _WARM_UP_TEXT = "你好。"
+
     def __init__(self, conf_dict: dict, queue=None):
         super().__init__(conf_dict, queue=queue)
         self.config: TTSClientConfig = TTSClientConfig(conf_dict)
         self.ai_config = AIClientConfig(conf_dict)
         self._weights: dict[str, AIWeightsPaths] = defaultdict()
+        self._current_weights = ""
+        # 当前模型的提示参数，切换模型时生成一次
+        self._profile: PromptProfile | None = None
+        self._weights_index = WeightsIndex(self.ai_config.weights_index_path)
+        self._switch_latency: deque[float] = deque(maxlen=100)
+        self._warm_up_latency: deque[float] = deque(maxlen=100)
+        self._warm_up_tasks: set[asyncio.Task] = set()
+        self._cache = AudioCache(self.config.cache_memory_bytes, self.config.cache_dir, self.config.cache_disk_bytes)
+        self._transport = HttpTransport(
+            connect_timeout=self.ai_config.connect_timeout,
+            read_timeout=self.ai_config.read_timeout,
+            total_timeout=self.ai_config.total_timeout,
+            max_retries=self.ai_config.max_retries,
+            breaker_threshold=self.ai_config.breaker_threshold,
+            breaker_reset_timeout=self.ai_config.breaker_reset_timeout,
+            on_circuit_change=self._on_circuit_change
+        )
+        self._pool = BackendPool(self.ai_config.api_urls, lambda: self._transport.session,
+                                 self.ai_config.health_check_interval, on_readmit=self._reapply_weights,
+                                 is_available=lambda backend: self._transport.available(backend.url))
 
     @property
     def weights_names(self) -> list[str]:
         return list(self._weights.keys())
 
-    def _set_target_lang(self, text: str):
-        if any('\u3040' <= char <= '\u309f' or '\u30a0' <= char <= '\u30ff' for char in text):
-            self.ai_config.target_lang = "auto"
-        else:
-            self.ai_config.target_lang = "zh"
+    @property
+    def cache(self) -> AudioCache:
+        return self._cache
+
+    @property
+    def pool(self) -> BackendPool:
+        return self._pool
+
+    @property
+    def transport(self) -> HttpTransport:
+        return self._transport
+
+    def _on_circuit_change(self, origin: str, state: CircuitState):
+        # 所有后端都熔断时，排队中的弹幕必然失败，直接丢弃以免恢复后朗读过期内容
+        if state == CircuitState.open and not self._pool.has_ready(self._current_weights):
+            shed = self.tts_queue.clear()
+            for item in shed:
+                item.evict("backend_down")
+            if shed:
+                logging.warning(f"[TTS][AI] 所有后端不可用，丢弃排队中的 {len(shed)} 条弹幕")
 
     @override
-    async def tts_worker(self):
-        while self._running:
-            if not self.weights_names:
-                await asyncio.sleep(1)
-                continue
-            text = await self.tts_queue.get()
-            try:
-                logging.info(f"[TTS][AI] {text}")
-                target_url = URL(self.ai_config.api_url) / "tts"
-                self._set_target_lang(text)
+    async def close(self):
+        for task in self._warm_up_tasks:
+            task.cancel()
+        await super().close()
+        await self._transport.close()
 
-                if self._session.closed:
-                    self._session = aiohttp.ClientSession()
+    @override
+    def start(self):
+        super().start()
+        self._pool.start()
 
-                post_data = self.ai_config.post_req(text)
-                # 发送 POST 请求并流式读取响应
-                await self._post_tts(target_url, post_data)
+    @override
+    async def stop_worker(self):
+        await self._pool.stop()
+        await super().stop_worker()
 
-            except Exception as e:
-                ex = AITTSClientException(e)
-                logging.error(ex)
-            finally:
-                self.tts_queue.task_done()
-
-    def _find_ref_audio(self, name: str) -> str:
-        audio_root = self.ai_config.ref_audio_root
-        audio_path = None
-        for path in audio_root.glob(f"{name}"):
-            logging.info(f"[TTS][AI] 搜索{path.stem}的示例音频")
-            audio_path = path
-            break
-        if not audio_path or not audio_path.exists():
-            raise AITTSClientException(f"未找到模型 {name} 的参考音频文件夹")
-        audio = None
-        for path in audio_path.rglob("*.wav"):
-            logging.info(f"[TTS][AI] 找到模型 {name} 的示例音频: {path.name}")
-            audio = path
-            break
-        if not audio or not audio.exists():
-            raise AITTSClientException(f"未找到模型 {name} 的参考音频文件")
-        return str(audio)
+    @override
+    def _ready(self) -> bool:
+        return self._profile is not None and self._pool.has_ready(self._profile.weights_name)
+
+    def request_spec(self, text: str, streaming: bool | None = None) -> TTSRequestSpec:
+        """按当前模型生成请求描述；之后切换模型不影响已生成的描述"""
+        if self._profile is None:
+            raise AITTSClientException("尚未载入模型")
+        return prepare(text, self._profile, self.ai_config.streaming_mode if streaming is None else streaming)
+
+    @override
+    async def synthesize(self, item: TTSQueueItem) -> bytes | None:
+        spec = self.request_spec(item.text)
+        logging.info(f"[TTS][AI] {spec.text} ({spec.text_lang})")
+        if item.prefix and not spec.streaming:
+            # 发送人前缀与正文分段合成、分别缓存：不同观众发的相同短弹幕也能命中正文的缓存
+            body = self.request_spec(item.content, streaming=False)
+            parts = (self.request_spec(item.prefix, streaming=False), *chunk(body, self.config.chunk_chars))
+        else:
+            parts = chunk(spec, self.config.chunk_chars)
+        if len(parts) > 1:
+            return await self._synthesize_chunks(parts, item)
+        return await self._synthesize_spec(spec, item)
+
+    async def _synthesize_spec(self, spec: TTSRequestSpec, item: TTSQueueItem | None) -> bytes | None:
+        """合成单个请求描述，先查缓存。item 为 None 表示长消息中的一段，不单独统计首个音频耗时"""
+        key = cache_key(*spec.cache_fields)
+        audio_data = await self._cache.get(key)
+        if audio_data is not None:
+            logging.info(f"[TTS][AI] 命中音频缓存，命中率 {self._cache.hit_ratio:.0%}，"
+                         f"累计节省 {self._cache.bytes_saved // 1024} KB")
+            return audio_data
+
+        async with self._pool.acquire(spec.profile.weights_name) as backend:
+            target_url = URL(backend.url) / "tts"
+            start = time.perf_counter()
+            if spec.streaming and item is not None:
+                audio_data = await self._post_tts_streaming(target_url, spec, item, start)
+            else:
+                audio_data = await self._post_tts(target_url, spec)
+                if audio_data and item is not None:
+                    self._record_ttfa(time.perf_counter() - start, "buffered")
+        if audio_data:
+            await self._cache.put(key, audio_data)
+        return audio_data
+
+    async def _synthesize_chunks(self, parts: tuple[TTSRequestSpec, ...], item: TTSQueueItem) -> bytes | None:
+        """长消息分段并发合成（同时最多 segment_concurrency 段），按顺序接入同一个 PcmStream：
+        第一段合成完即开始播放，之后每段就绪后紧接着播放，首个音频耗时只取决于第一句"""
+        semaphore = asyncio.Semaphore(self.config.segment_concurrency)
+        start = time.perf_counter()
+
+        async def run(part: TTSRequestSpec) -> bytes | None:
+            # 信号量先到先得，前面的段先拿到并发名额
+            async with semaphore:
+                return await self._synthesize_spec(part, None)
+
+        tasks = [asyncio.create_task(run(part)) for part in parts]
+        logging.info(f"[TTS][AI] 长消息切分为 {len(parts)} 段合成")
+        stream = PcmStream()
+        fmt: WavFormat | None = None
+        pcm = bytearray()
+        try:
+            for index, task in enumerate(tasks):
+                try:
+                    audio_data = await task
+                    parsed = parse_wav_header(audio_data) if audio_data else None
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.error(AITTSClientException(f"第 {index + 1} 段合成失败: {e}"))
+                    continue
+                if parsed is None:
+                    continue
+                part_fmt, offset = parsed
+                if fmt is None:
+                    fmt = part_fmt
+                    stream.feed(build_wav(fmt, b""))
+                    self._record_ttfa(time.perf_counter() - start, "chunked")
+                    item.attach_stream(stream)
+                elif part_fmt != fmt:
+                    logging.warning(f"[TTS][AI] 第 {index + 1} 段音频格式与前文不一致，已跳过")
+                    continue
+                data = audio_data[offset:]
+                pcm.extend(data)
+                stream.feed(data)
+        finally:
+            stream.finish()
+            for task in tasks:
+                task.cancel()
+        return build_wav(fmt, bytes(pcm)) if fmt is not None else None
+
+    def _post(self, target_url: URL, spec: TTSRequestSpec, stream: bool = False):
+        return self._transport.request("POST", target_url, stream=stream, data=spec.payload,
+                                       headers={"Content-Type": "application/json"})
+
+    async def _post_tts(self, target_url: URL, spec: TTSRequestSpec) -> bytes | None:
+        async with self._post(target_url, spec) as resp:
+            if resp.status == 200:
+                logging.debug("[TTS]成功接收生成语音")
+                return await resp.read()
+            err_text = await resp.text()
+            ex = AITTSClientException(f"服务返回错误 [{resp.status}]: {err_text}")
+            logging.error(ex)
+            return None
+
+    async def _post_tts_streaming(self, target_url: URL, spec: TTSRequestSpec, item: TTSQueueItem,
+                                  start: float) -> bytes | None:
+        """流式读取响应，PCM 块一到达就交给播放器；完整读完后返回整段 WAV 供缓存"""
+        stream = PcmStream()
+        raw = bytearray()
+        try:
+            async with self._post(target_url, spec, stream=True) as resp:
+                if resp.status != 200:
+                    err_text = await resp.text()
+                    ex = AITTSClientException(f"服务返回错误 [{resp.status}]: {err_text}")
+                    logging.error(ex)
+                    return None
+                async for chunk in resp.content.iter_chunked(4096):
+                    raw.extend(chunk)
+                    stream.feed(chunk)
+                    if item.stream is None and stream.format is not None:
+                        self._record_ttfa(time.perf_counter() - start, "streaming")
+                        item.attach_stream(stream)
+        finally:
+            stream.finish()
+        parsed = parse_wav_header(raw)
+        if parsed is None:
+            return None
+        fmt, offset = parsed
+        return build_wav(fmt, bytes(raw[offset:]))
+
+    async def _apply_weights(self, backend: Backend, name: str, is_test: bool) -> bool:
+        """在单个后端上切换模型，已载入的权重不再重复下发；成功后记录该后端已载入的模型"""
+        paths = self._weights[name]
+        need_gpt = backend.loaded_gpt_path != paths.gpt_path
+        need_sovits = backend.loaded_sovits_path != paths.sovits_path
+        if not (need_gpt or need_sovits):
+            logging.info(f"[TTS][AI] 后端 {backend.url} 已载入模型 {name}，跳过切换")
+            backend.loaded_weights = name
+            return True
+        backend.loaded_weights = None
+        start = time.perf_counter()
+        if need_gpt:
+            if not await self._request_switch_weights(backend, "set_gpt_weights", paths.gpt_path, is_test):
+                return False
+            # 测试模式下没有真实载入，不记录，以免之后的真实切换被跳过
+            backend.loaded_gpt_path = None if is_test else paths.gpt_path
+        if need_sovits:
+            if not await self._request_switch_weights(backend, "set_sovits_weights", paths.sovits_path, is_test):
+                return False
+            backend.loaded_sovits_path = None if is_test else paths.sovits_path
+        backend.loaded_weights = name
+        if not is_test:
+            elapsed = time.perf_counter() - start
+            self._switch_latency.append(elapsed)
+            model_switch_seconds.observe(elapsed, backend.url)
+            backend.cold = True
+            logging.info(f"[TTS][AI] 后端 {backend.url} 切换模型 {name} 耗时 {elapsed * 1000:.0f}ms")
+        return True
+
+    async def _reapply_weights(self, backend: Backend):
+        """后端恢复后重新下发当前模型"""
+        if self._current_weights and await self._apply_weights(backend, self._current_weights, False):
+            self._schedule_warm_up()
+
+    def _schedule_warm_up(self):
+        """对刚切换过模型的后端在后台做一次短合成，让第一条真实弹幕不必承担冷启动开销"""
+        for backend in self._pool.backends:
+            if backend.cold:
+                backend.cold = False
+                task = asyncio.create_task(self._warm_up(backend, self._current_weights))
+                self._warm_up_tasks.add(task)
+                task.add_done_callback(self._warm_up_tasks.discard)
+
+    async def _warm_up(self, backend: Backend, name: str):
+        spec = self.request_spec(self._WARM_UP_TEXT, streaming=False)
+        start = time.perf_counter()
+        try:
+            # 预热期间计入进行中的请求，负载均衡会优先选择其他后端
+            with backend.track():
+                async with self._post(URL(backend.url) / "tts", spec) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        raise AITTSClientException(f"服务返回错误 [{resp.status}]")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"[TTS][AI] 后端 {backend.url} 预热失败: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        self._warm_up_latency.append(elapsed)
+        warm_up_seconds.observe(elapsed, backend.url)
+        logging.info(f"[TTS][AI] 后端 {backend.url} 模型 {name} 预热完成，耗时 {elapsed * 1000:.0f}ms")
+
+    @property
+    def model_stats(self) -> dict[str, dict[str, float]]:
+        """最近 100 次模型切换与预热的耗时（秒）"""
+        return _summarize({"switch": self._switch_latency, "warm_up": self._warm_up_latency})
 
     async def switch_weights(self, name: str) -> bool:
+        # not_test 只对紧接着的一次切换生效
+        is_test = self._is_test
+        self._is_test = True
         try:
             if name not in self._weights:
                 raise AITTSClientException(f"不存在名为 {name} 的模型文件")
-            paths = self._weights[name]
-            gpt_success = await self._request_switch_weights("set_gpt_weights", paths.gpt_path)
-            sovits_success = await self._request_switch_weights("set_sovits_weights", paths.sovits_path)
-            if gpt_success and sovits_success:
-                self.ai_config.ref_audio_path = paths.ref_audio_path
+            # 提示参数在下发权重前推出，参考音频路径有误时不必切换后端
+            profile = self.ai_config.prompt_profile(name, self._weights[name].ref_audio_path)
+            succeeded = await self._pool.for_each(lambda backend: self._apply_weights(backend, name, is_test))
+            if succeeded:
+                self.ai_config.ref_audio_path = profile.ref_audio_path
+                self._current_weights = name
+                self._profile = profile
+                self._admission.set_voice(name)
+                self._schedule_warm_up()
                 return True
             raise AITTSClientException("访问失败")
         except Exception as e:
@@ -212,14 +676,13 @@ class AITTSClient(TTSClient):
             logging.error(ex)
             return False
 
-    async def _request_switch_weights(self, endpoint: str, path: str) -> bool:
-        logging.info("[TTS][AI] 切换模型文件: " + path)
-        if self._is_test:
+    async def _request_switch_weights(self, backend: Backend, endpoint: str, path: str, is_test: bool) -> bool:
+        logging.info(f"[TTS][AI] 切换模型文件 ({backend.url}): {path}")
+        if is_test:
             return True
-        self._is_test = True
         params = {"weights_path": path}
-        target_url = (URL(self.ai_config.api_url) / endpoint).with_query(params)
-        async with self._session.get(target_url) as resp:
+        target_url = (URL(backend.url) / endpoint).with_query(params)
+        async with self._transport.request("GET", target_url) as resp:
             if resp.status == 200:
                 data = await resp.json()
                 if data.get("message") == "success":
@@ -229,36 +692,16 @@ class AITTSClient(TTSClient):
                 logging.error(AITTSClientException(data["message"]))
             return False
 
-    def _search_gpt_weights(self, gpt_root, sovits_root):
-        for gpt_file_path in gpt_root.glob("*.ckpt"):
-            name: str = get_name(gpt_file_path.stem)
-            sovits_file_path = None
-            logging.info(f"[TTS][AI] 找到模型文件: {gpt_file_path.name}，正在寻找对应的 SoVits 权重文件...")
-            for path in sovits_root.glob(f"{name}*.pth"):
-                logging.info(f"[TTS][AI] 找到模型文件: {gpt_file_path.name} 和 {path.name}")
-                sovits_file_path = path
-            if sovits_file_path is not None and sovits_file_path.exists():
-                try:
-                    self._weights[name] = AIWeightsPaths(
-                        gpt_path=str(gpt_file_path),
-                        sovits_path=str(sovits_file_path),
-                        ref_audio_path=self._find_ref_audio(name)
-                    )
-                except Exception as e:
-                    logging.error(f"模型 {name} 的不存在示例语音，已跳过: {e}")
-                    continue
-            else:
-                logging.warning(f"未找到与 {gpt_file_path.name} 对应的 SoVits 权重文件，已跳过")
-
     async def scan_weights(self):
         self._weights.clear()
-        if not self._session or self._session.closed:
-            self._session = aiohttp.ClientSession()
+        version = self.ai_config.version
         root = self.ai_config.gpt_sovits_root
-        gpt_root = root / f"GPT_weights_{self.ai_config.version}" if self.ai_config.version != "v1" else "GPT_weights"
-        sovits_root = root / f"SoVITS_weights_{self.ai_config.version}" if self.ai_config.version != "v1" else "SoVITS_weights"
+        gpt_root = root / (f"GPT_weights_{version}" if version != "v1" else "GPT_weights")
+        sovits_root = root / (f"SoVITS_weights_{version}" if version != "v1" else "SoVITS_weights")
         try:
-            self._search_gpt_weights(gpt_root, sovits_root)
+            # 扫描涉及大量文件系统访问，放到线程中执行，避免阻塞界面
+            self._weights.update(await asyncio.to_thread(
+                self._weights_index.scan, version, gpt_root, sovits_root, self.ai_config.ref_audio_root))
             if not self._weights:
                 raise AITTSClientException("未找到任何有效的 GPT-SoVits 模型文件，请检查配置路径是否正确")
             else:
@@ -274,13 +717,11 @@ class AITTSClient(TTSClient):
 class EdgeTTSClient(TTSClient):
     async def tts_worker(self):
         while self._running:
-            text = await self.tts_queue.get()
+            item = await self.tts_queue.get()
             try:
-                logging.info(f"[TTS][Edge-TTS] {text}")
+                logging.info(f"[TTS][Edge-TTS] {item.text}")
                 await asyncio.sleep(3)
             except Exception as e:
                 ex = EdgeTTSClientException(e)
                 logging.error(ex)
                 raise ex
-            finally:
-                self.tts_queue.task_done()
@@ -0,0 +1,223 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import deque
+from enum import StrEnum
+from typing import Callable
+
+from Models import TTSQueueItem
+
+Scorer = Callable[[TTSQueueItem], float]
+
+
+class EvictionPolicy(StrEnum):
+    lowest = "lowest"
+    oldest = "oldest"
+    random = "random"
+
+
+class PriorityScorer:
+    """默认打分：粉丝牌等级、消息类型、合并人数加分，等待越久分数越高，避免低等级弹幕饿死。
+
+    等待时长按入队时刻线性计入，所有条目随时间等速增长，堆中的相对顺序不变，无需重新打分。
+    默认每等待 10 秒相当于粉丝牌高一级。
+    """
+
+    def __init__(self, badge_weight: float = 1.0, count_weight: float = 2.0, age_weight: float = 0.1,
+                 kind_weights: dict[str, float] | None = None):
+        self._badge_weight = badge_weight
+        self._count_weight = count_weight
+        self._age_weight = age_weight
+        self._kind_weights = kind_weights or {}
+
+    def __call__(self, item: TTSQueueItem) -> float:
+        score = self._badge_weight * item.badge_level
+        score += self._count_weight * (item.count - 1)
+        score += self._kind_weights.get(item.kind, 0.0)
+        return score - self._age_weight * item.enqueued_at
+
+
+class _Entry:
+    __slots__ = ("item", "score", "seq", "pos", "version", "removed")
+
+    def __init__(self, item: TTSQueueItem, score: float, seq: int, pos: int):
+        self.item = item
+        self.score = score
+        self.seq = seq
+        self.pos = pos
+        # 重新打分后旧的堆节点按版本号失效
+        self.version = 0
+        self.removed = False
+
+
+class TTSScheduler:
+    """堆实现的 TTS 优先队列，替代 asyncio.Queue。
+
+    出队取分数最高者；按截止时间淘汰过期条目；队满时按策略淘汰分数最低、最旧或随机的条目。
+    各个堆均为惰性删除，入队、出队、淘汰的均摊复杂度为 O(log n)。
+    """
+
+    def __init__(self, scorer: Scorer | None = None, ttl: float = 0.0):
+        self._scorer: Scorer = scorer or PriorityScorer()
+        self._ttl = ttl
+        self._seq = itertools.count()
+        self._by_priority: list[tuple[float, int, int, _Entry]] = []
+        self._by_lowest: list[tuple[float, int, int, _Entry]] = []
+        self._by_deadline: list[tuple[float, int, int, _Entry]] = []
+        self._by_age: deque[_Entry] = deque()
+        # 随机淘汰用的稠密数组，删除时与末尾交换
+        self._entries: list[_Entry] = []
+        self._index: dict[int, _Entry] = {}
+        self._not_empty = asyncio.Event()
+        self._expired = 0
+
+    @property
+    def expired(self) -> int:
+        return self._expired
+
+    def set_scorer(self, scorer: Scorer):
+        """更换打分函数并对已排队条目重新打分"""
+        self._scorer = scorer
+        for entry in list(self._entries):
+            self.reprioritize(entry.item)
+
+    def qsize(self) -> int:
+        return len(self._entries)
+
+    def empty(self) -> bool:
+        return not self._entries
+
+    def items(self) -> list[TTSQueueItem]:
+        """当前排队的条目，顺序不保证"""
+        return [entry.item for entry in self._entries]
+
+    def __contains__(self, item: TTSQueueItem) -> bool:
+        return id(item) in self._index
+
+    def _push(self, item: TTSQueueItem) -> _Entry:
+        score = item.score = self._scorer(item)
+        entry = _Entry(item, score, next(self._seq), len(self._entries))
+        self._entries.append(entry)
+        self._index[id(item)] = entry
+        self._push_score(entry)
+        self._by_age.append(entry)
+        return entry
+
+    def _push_score(self, entry: _Entry):
+        heapq.heappush(self._by_priority, (-entry.score, entry.seq, entry.version, entry))
+        heapq.heappush(self._by_lowest, (entry.score, entry.seq, entry.version, entry))
+
+    def _remove(self, entry: _Entry):
+        entry.removed = True
+        del self._index[id(entry.item)]
+        last = self._entries.pop()
+        if last is not entry:
+            last.pos = entry.pos
+            self._entries[entry.pos] = last
+        self._compact()
+
+    def _compact(self):
+        # 惰性删除的残留超过存活条目数的两倍时重建各堆，控制内存
+        limit = 2 * len(self._entries) + 64
+        if max(len(self._by_priority), len(self._by_lowest), len(self._by_deadline), len(self._by_age)) > limit:
+            self._by_priority = [(-e.score, e.seq, e.version, e) for e in self._entries]
+            self._by_lowest = [(e.score, e.seq, e.version, e) for e in self._entries]
+            self._by_deadline = [(e.item.deadline, e.seq, 0, e) for e in self._entries if e.item.deadline]
+            heapq.heapify(self._by_priority)
+            heapq.heapify(self._by_lowest)
+            heapq.heapify(self._by_deadline)
+            self._by_age = deque(sorted(self._entries, key=lambda e: e.seq))
+
+    @staticmethod
+    def _peek(heap: list, versioned: bool = True) -> '_Entry | None':
+        while heap:
+            _, _, version, entry = heap[0]
+            if not entry.removed and (not versioned or version == entry.version):
+                return entry
+            heapq.heappop(heap)
+        return None
+
+    def put_nowait(self, item: TTSQueueItem):
+        item.enqueued_at = time.monotonic()
+        if self._ttl > 0 and not item.deadline:
+            item.deadline = item.enqueued_at + self._ttl
+        entry = self._push(item)
+        if item.deadline:
+            heapq.heappush(self._by_deadline, (item.deadline, entry.seq, 0, entry))
+        self._not_empty.set()
+
+    def reprioritize(self, item: TTSQueueItem):
+        """条目属性变化（例如合并了重复弹幕）后重新打分"""
+        entry = self._index.get(id(item))
+        if entry is None:
+            return
+        entry.score = item.score = self._scorer(item)
+        entry.version += 1
+        self._push_score(entry)
+        self._compact()
+
+    def expire(self, now: float | None = None) -> list[TTSQueueItem]:
+        """移除已过截止时间的条目"""
+        now = time.monotonic() if now is None else now
+        expired = []
+        while (entry := self._peek(self._by_deadline, versioned=False)) is not None and entry.item.deadline <= now:
+            heapq.heappop(self._by_deadline)
+            self._remove(entry)
+            entry.item.evict("expired")
+            expired.append(entry.item)
+        if expired:
+            self._expired += len(expired)
+            logging.info(f"[TTS] 丢弃 {len(expired)} 条过期弹幕")
+        return expired
+
+    def get_nowait(self) -> TTSQueueItem:
+        self.expire()
+        entry = self._peek(self._by_priority)
+        if entry is None:
+            self._not_empty.clear()
+            raise asyncio.QueueEmpty
+        heapq.heappop(self._by_priority)
+        self._remove(entry)
+        return entry.item
+
+    async def get(self) -> TTSQueueItem:
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                await self._not_empty.wait()
+
+    def peek_victim(self, policy: EvictionPolicy) -> TTSQueueItem | None:
+        """按策略返回下一个应被淘汰的条目，不移除"""
+        if not self._entries:
+            return None
+        if policy == EvictionPolicy.lowest:
+            return self._peek(self._by_lowest).item
+        if policy == EvictionPolicy.oldest:
+            while self._by_age[0].removed:
+                self._by_age.popleft()
+            return self._by_age[0].item
+        return random.choice(self._entries).item
+
+    def remove(self, item: TTSQueueItem) -> bool:
+        entry = self._index.get(id(item))
+        if entry is None:
+            return False
+        self._remove(entry)
+        return True
+
+    def clear(self) -> list[TTSQueueItem]:
+        items = [entry.item for entry in self._entries]
+        for entry in self._entries:
+            entry.removed = True
+        self._entries.clear()
+        self._index.clear()
+        self._by_priority.clear()
+        self._by_lowest.clear()
+        self._by_deadline.clear()
+        self._by_age.clear()
+        self._not_empty.clear()
+        return items
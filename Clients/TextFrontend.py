@@ -0,0 +1,103 @@
+import re
+
+from Models import PromptProfile, TTSRequestSpec
+
+# 按文字类别切分连续片段：假名、拉丁字母、汉字；其余字符（数字、标点、空白）归入相邻片段
+_KANA = "\u3040-\u30ff\u31f0-\u31ff\uff66-\uff9f"
+_HAN = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_SCRIPT_RUN = re.compile(rf"(?P<ja>[{_KANA}]+)|(?P<en>[A-Za-z\uff21-\uff3a\uff41-\uff5a]+)|(?P<zh>[{_HAN}]+)")
+
+_WHITESPACE = re.compile(r"\s+")
+# 同一字符连续超过 3 个（"哈哈哈哈哈哈"、"!!!!!!"）只保留 3 个，朗读效果相同，也更容易命中缓存
+_REPEATED_CHAR = re.compile(r"(.)\1{3,}")
+
+
+def normalize(text: str) -> str:
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _REPEATED_CHAR.sub(r"\1\1\1", text)
+
+
+def split_segments(text: str) -> tuple[tuple[str, str], ...]:
+    """把文本切成语言连续的片段，相邻同语言片段合并"""
+    segments: list[list[str]] = []
+    cursor = 0
+    for match in _SCRIPT_RUN.finditer(text):
+        lang = match.lastgroup
+        # 两个片段之间的中性字符并入前一个片段
+        gap = text[cursor:match.start()]
+        cursor = match.end()
+        if segments:
+            segments[-1][1] += gap
+            if segments[-1][0] == lang:
+                segments[-1][1] += match.group()
+                continue
+            segments.append([lang, match.group()])
+        else:
+            segments.append([lang, gap + match.group()])
+    tail = text[cursor:]
+    if segments:
+        segments[-1][1] += tail
+    elif tail:
+        # 只有数字、标点时按中文朗读
+        segments.append(["zh", tail])
+    return tuple((lang, segment) for lang, segment in segments)
+
+
+def segments_lang(segments: tuple[tuple[str, str], ...]) -> str:
+    """由片段得出整条请求的 text_lang。GPT-SoVITS 的 zh/ja 分别是中英、日英混合模式，
+    片段里出现的语言决定用哪一种；只有英文片段时为 en。
+    汉字与假名同时出现时无法按字符区分中日文（日文汉字、中文里夹的假名颜文字），交给服务端 auto 判断"""
+    langs = {lang for lang, _ in segments}
+    if "ja" in langs and "zh" in langs:
+        return "auto"
+    if "ja" in langs:
+        return "ja"
+    if langs == {"en"}:
+        return "en"
+    return "zh"
+
+
+def _spec(text: str, profile: PromptProfile, streaming: bool) -> TTSRequestSpec:
+    segments = split_segments(text)
+    return TTSRequestSpec(text, segments_lang(segments), segments, profile, streaming)
+
+
+def prepare(text: str, profile: PromptProfile, streaming: bool) -> TTSRequestSpec:
+    """文本前端：规范化、识别语言并切分片段，与当前模型的提示参数合并为不可变的请求描述"""
+    return _spec(normalize(text), profile, streaming)
+
+
+# 句末标点（含换行）之后切开；单句仍然过长时再按分句标点切开
+_SENTENCE = re.compile(r"[^。！？!?；;…\n]*[。！？!?；;…\n]+|[^。！？!?；;…\n]+$")
+_CLAUSE = re.compile(r"[^，,、：:]*[，,、：:]+|[^，,、：:]+$")
+
+
+def _pieces(text: str, pattern: re.Pattern) -> list[str]:
+    return [piece for piece in pattern.findall(text) if piece.strip()]
+
+
+def split_sentences(text: str, max_chars: int) -> list[str]:
+    """在句子/分句边界把文本切成不超过 max_chars 的片段，过短的相邻片段合并，避免发出大量极短请求"""
+    pieces: list[str] = []
+    for sentence in _pieces(text, _SENTENCE):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for clause in _pieces(sentence, _CLAUSE):
+            # 没有任何标点的长串只能硬切
+            pieces.extend(clause[i:i + max_chars] for i in range(0, len(clause), max_chars))
+    chunks: list[str] = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + len(piece) <= max_chars:
+            chunks[-1] += piece
+        else:
+            chunks.append(piece)
+    return [chunk.strip() for chunk in chunks]
+
+
+def chunk(spec: TTSRequestSpec, max_chars: int) -> tuple[TTSRequestSpec, ...]:
+    """长文本按句切成多个请求描述，各自识别语言；不超过 max_chars（或 max_chars 为 0）时原样返回"""
+    if max_chars <= 0 or len(spec.text) <= max_chars:
+        return spec,
+    # 分段合成后由客户端按序拼接播放，各段本身不走流式
+    return tuple(_spec(text, spec.profile, False) for text in split_sentences(spec.text, max_chars))
@@ -0,0 +1,176 @@
+import bisect
+import logging
+import os
+from pathlib import Path
+
+from Exceptions import AITTSClientException
+from Models import AIWeightsPaths
+from utils.FastJson import loads, dumps
+
+
+def get_name(full_name: str) -> str:
+    """模型名为权重文件名最后一个 "-" 之前的部分"""
+    name, sep, _ = full_name.rpartition("-")
+    if not sep or not name:
+        raise AITTSClientException("模型名提取失败")
+    return name
+
+
+def _signature(path: Path) -> list | None:
+    """文件或目录的 (mtime_ns, size)，不存在时返回 None"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _list_files(directory: Path, suffix: str) -> dict[str, list]:
+    """一次 scandir 列出目录下指定后缀的文件及其签名"""
+    files = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(suffix):
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        pass
+    return files
+
+
+def _chain_signature(directory: Path, wav: Path) -> list | None:
+    """从 directory 到 wav 所在目录逐层的 mtime。只需 stat 这条路径上的几层目录，不遍历整棵树；
+    wav 不在 directory 下或任一层已不存在时返回 None"""
+    try:
+        parts = wav.parent.relative_to(directory).parts
+    except ValueError:
+        return None
+    signature = []
+    current = directory
+    for part in ("", *parts):
+        current = current / part
+        try:
+            signature.append(os.stat(current).st_mtime_ns)
+        except OSError:
+            return None
+    return signature
+
+
+def _first_wav(directory: Path) -> Path | None:
+    for path in directory.rglob("*.wav"):
+        return path
+    return None
+
+
+class WeightsIndex:
+    """GPT-SoVITS 模型目录的持久化索引：(版本, 模型名) -> AIWeightsPaths。
+
+    重新扫描时先比对目录与已选文件的 mtime/大小，只重新列出发生变化的目录；
+    ckpt 与 pth 的配对在排好序的文件名上二分查找前缀，不再对每个模型单独 glob。
+    所有方法都是同步的文件操作，调用方应放到线程中执行。
+    """
+
+    def __init__(self, path: str | Path):
+        self._path = Path(path)
+        self._data: dict[str, dict] = {}
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            self._data = loads(self._path.read_bytes())
+        except FileNotFoundError:
+            self._data = {}
+        except Exception as e:
+            logging.warning(f"[TTS][AI] 模型索引损坏，将重新扫描: {e}")
+            self._data = {}
+
+    def _save(self):
+        tmp = self._path.with_suffix(".tmp")
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(dumps(self._data))
+            os.replace(tmp, self._path)
+        except OSError as e:
+            logging.warning(f"[TTS][AI] 模型索引写入失败: {e}")
+
+    @staticmethod
+    def _refresh_dir(cached: dict | None, directory: Path, suffix: str) -> tuple[dict, bool]:
+        """目录 mtime 未变且已记录文件的签名都未变时沿用缓存，否则重新列出"""
+        signature = _signature(directory)
+        if cached and cached.get("signature") == signature:
+            files = cached["files"]
+            if all(_signature(directory / name) == sig for name, sig in files.items()):
+                return cached, False
+        return {"signature": signature, "files": _list_files(directory, suffix)}, True
+
+    @staticmethod
+    def _pair(gpt_files: dict[str, list], sovits_files: dict[str, list]) -> dict[str, list[str]]:
+        """按模型名配对 ckpt 与 pth：pth 文件名以模型名开头，多个匹配时取修改时间最新的一个"""
+        sovits_names = sorted(sovits_files)
+        pairs = {}
+        for gpt_name in sorted(gpt_files):
+            name = get_name(Path(gpt_name).stem)
+            start = bisect.bisect_left(sovits_names, name)
+            end = bisect.bisect_left(sovits_names, name + "\U0010ffff")
+            if start == end:
+                logging.warning(f"未找到与 {gpt_name} 对应的 SoVits 权重文件，已跳过")
+                continue
+            sovits_name = max(sovits_names[start:end], key=lambda n: sovits_files[n][0])
+            pairs[name] = [gpt_name, sovits_name]
+        return pairs
+
+    @staticmethod
+    def _find_ref_audio(cached: dict | None, ref_root: Path, name: str) -> dict | None:
+        """参考音频：模型同名目录（含子目录）下的第一个 wav。
+        已选文件仍存在、且从模型目录到它所在目录的各层 mtime 均未变时沿用缓存；
+        无关子目录里的增删不影响已选文件是否可用，不必为此遍历整棵目录树"""
+        directory = ref_root / name
+        if cached:
+            wav = Path(cached["wav"])
+            if _signature(wav) is not None and cached.get("signature") == _chain_signature(directory, wav):
+                return cached
+        if _signature(directory) is None:
+            return None
+        wav = _first_wav(directory)
+        if wav is None:
+            return None
+        logging.info(f"[TTS][AI] 找到模型 {name} 的示例音频: {wav.name}")
+        return {"signature": _chain_signature(directory, wav), "wav": str(wav)}
+
+    def scan(self, version: str, gpt_root: Path, sovits_root: Path, ref_root: Path) -> dict[str, AIWeightsPaths]:
+        self._load()
+        key = f"{version}|{gpt_root}|{sovits_root}|{ref_root}"
+        cached = self._data.get(key, {})
+        gpt, gpt_changed = self._refresh_dir(cached.get("gpt"), gpt_root, ".ckpt")
+        sovits, sovits_changed = self._refresh_dir(cached.get("sovits"), sovits_root, ".pth")
+        if gpt_changed or sovits_changed or "pairs" not in cached:
+            pairs = self._pair(gpt["files"], sovits["files"])
+        else:
+            pairs = cached["pairs"]
+
+        cached_refs: dict = cached.get("refs", {})
+        refs = {}
+        weights: dict[str, AIWeightsPaths] = {}
+        for name, (gpt_name, sovits_name) in pairs.items():
+            ref = self._find_ref_audio(cached_refs.get(name), ref_root, name)
+            if ref is None:
+                logging.error(f"模型 {name} 的不存在示例语音，已跳过")
+                continue
+            refs[name] = ref
+            weights[name] = AIWeightsPaths(
+                gpt_path=str(gpt_root / gpt_name),
+                sovits_path=str(sovits_root / sovits_name),
+                ref_audio_path=ref["wav"]
+            )
+
+        entry = {"gpt": gpt, "sovits": sovits, "pairs": pairs, "refs": refs}
+        if entry != cached:
+            self._data[key] = entry
+            self._save()
+        logging.info(f"[TTS][AI] 模型索引: {len(weights)} 个模型"
+                     f"{'（目录有变化，已重新列出）' if gpt_changed or sovits_changed else ''}")
+        return weights
@@ -1,8 +1,15 @@
 from .DanmakuClient import DanmakuClient
 from .TTSClient import TTSClient, AITTSClient
+from .MetricsServer import MetricsServer
+from .EngineRegistry import EngineEntry, register_engine, engines, get_engine
 
 __all__ = [
     'TTSClient',
     'AITTSClient',
+    'EngineEntry',
+    'register_engine',
+    'engines',
+    'get_engine',
     'DanmakuClient',
+    'MetricsServer',
 ]
\ No newline at end of file
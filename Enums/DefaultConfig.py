@@ -5,10 +5,63 @@ class DefaultConfigName(StrEnum):
     danmaku_client = "danmakuClient"
     rsocket_ws_url = "rsocketUrL"
     task_ids = "taskIds"
+    batch_mode = "batchMode"
+    batch_interval_ms = "batchIntervalMs"
+    max_batch_size = "maxBatchSize"
+    buffer_size = "bufferSize"
+    reconnect_base_delay = "reconnectBaseDelay"
+    reconnect_max_delay = "reconnectMaxDelay"
+    shard_count = "shardCount"
+    shard_per_socket = "shardPerSocket"
+    dedup_window = "dedupWindow"
+    dedup_max_entries = "dedupMaxEntries"
+    dedup_replay_window = "dedupReplayWindow"
+    credit_window_ticks = "creditWindowTicks"
+    capture_dir = "captureDir"
+    capture_max_bytes = "captureMaxBytes"
+    capture_compress = "captureCompress"
+    replay_path = "replayPath"
+    replay_speed = "replaySpeed"
     ttl_client = "ttlClient"
+    metrics = "metrics"
+    host = "host"
+    port = "port"
+    loop_monitor = "loopMonitor"
+    sample_interval = "sampleInterval"
+    slow_callback_threshold = "slowCallbackThreshold"
+    report_path = "reportPath"
+    report_interval = "reportInterval"
     ai = "ai"
     api_url = "apiUrl"
+    health_check_interval = "healthCheckInterval"
+    connect_timeout = "connectTimeout"
+    read_timeout = "readTimeout"
+    total_timeout = "totalTimeout"
+    max_retries = "maxRetries"
+    breaker_threshold = "breakerThreshold"
+    breaker_reset_timeout = "breakerResetTimeout"
     ref_audio_root = "refAudioRoot"
     target_lang = "targetLang"
     max_queue_size = "maxQueueSize"
+    pipeline_depth = "pipelineDepth"
+    chunk_chars = "chunkChars"
+    segment_concurrency = "segmentConcurrency"
+    max_playback_rate = "maxPlaybackRate"
+    speed_up_backlog = "speedUpBacklog"
+    speed_up_wait = "speedUpWait"
+    latency_budget = "latencyBudget"
+    admission_min_chars = "admissionMinChars"
+    eviction_policy = "evictionPolicy"
+    message_ttl = "messageTtl"
+    fuzzy_dedup_window = "fuzzyDedupWindow"
+    fuzzy_dedup_distance = "fuzzyDedupDistance"
+    cache_memory_bytes = "cacheMemoryBytes"
+    cache_dir = "cacheDir"
+    cache_disk_bytes = "cacheDiskBytes"
     gs_root = "GPT-SoVitsRoot"
+    weights_index_path = "weightsIndexPath"
+    streaming_mode = "streamingMode"
+    offline = "offline"
+    command = "command"
+    workers = "workers"
+    synth_timeout = "synthTimeout"
@@ -16,3 +16,20 @@ class EdgeTTSClientException(TTSClientException):
     def __init__(self, message="error"):
         full_message = f"[Edge]{message}"
         super().__init__(full_message)
+
+class OfflineTTSClientException(TTSClientException):
+    """Base exception class for OfflineTTSClient errors."""
+    def __init__(self, message="error"):
+        full_message = f"[Offline]{message}"
+        super().__init__(full_message)
+
+class TransportException(AITTSClientException):
+    """Backend HTTP call failed after retries."""
+    def __init__(self, message="error"):
+        full_message = f"[HTTP]{message}"
+        super().__init__(full_message)
+
+class CircuitOpenException(TransportException):
+    """Backend circuit breaker is open; the call was rejected without being sent."""
+    def __init__(self, message="熔断中"):
+        super().__init__(message)
@@ -1,10 +1,13 @@
 from .DanmakuClient import DanmakuClientException, RsocketClientException
 from .GUI import ManagerCardException
-from .TTSClients import TTSClientException, AITTSClientException
+from .TTSClients import TTSClientException, AITTSClientException, OfflineTTSClientException, TransportException, CircuitOpenException
 
 __all__ = [
     "TTSClientException",
     "AITTSClientException",
+    "OfflineTTSClientException",
+    "TransportException",
+    "CircuitOpenException",
     "ManagerCardException",
     "DanmakuClientException",
     "RsocketClientException"
@@ -1,7 +1,11 @@
+import asyncio
+
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton
 
-from Clients import DanmakuClient
-from Models import Config
+from Clients import DanmakuClient, MetricsServer
+from Models import Config, MetricsConfig, LoopMonitorConfig
+from utils.LoopMonitor import LoopMonitor
 from .Overlay import OverlayPanel
 from .TTSEngineSwitcher import TTSEngineSwitcher
 
@@ -24,6 +28,20 @@ class MainConsole(QMainWindow):
             QPushButton#ActionBtn:pressed { background-color: #FFA000; }
         """)
         self._danmaku_client = DanmakuClient(self._config.danmaku_client)
+        # 本地指标端点，事件循环启动后再开始监听
+        metrics_config = MetricsConfig(self._config.metrics)
+        self._metrics_server: MetricsServer | None = None
+        self._metrics_task = None
+        if metrics_config.enabled:
+            self._metrics_server = MetricsServer(metrics_config.host, metrics_config.port)
+            QTimer.singleShot(0, self._start_metrics)
+        # 事件循环延迟与慢回调监控，同样在事件循环启动后开始
+        monitor_config = LoopMonitorConfig(self._config.loop_monitor)
+        self._loop_monitor: LoopMonitor | None = None
+        if monitor_config.enabled:
+            self._loop_monitor = LoopMonitor(monitor_config.sample_interval, monitor_config.slow_callback_threshold,
+                                             monitor_config.report_path, monitor_config.report_interval)
+            QTimer.singleShot(0, self._loop_monitor.start)
         self.panel = OverlayPanel(self._danmaku_client)
         self.panel.new_danmu_signal.connect(self.panel.add_danmu)
         self.panel.btn_close.clicked.connect(self.recreate_panel)
@@ -51,6 +69,30 @@ class MainConsole(QMainWindow):
         self.engine_switcher = TTSEngineSwitcher(self._config.tts_client, self.panel)
         layout.addWidget(self.engine_switcher)
 
+        # TTS 队列状态：积压条数与按实测延迟推算的有效队列长度
+        self._queue_lbl = QLabel("TTS 队列: -")
+        self._queue_lbl.setStyleSheet("color: #888;")
+        layout.addWidget(self._queue_lbl)
+        self._queue_timer = QTimer(self)
+        self._queue_timer.setInterval(500)
+        self._queue_timer.timeout.connect(self.update_queue_text)
+        self._queue_timer.start()
+
+        # 调试视图：事件循环延迟分位数与阻塞最久的回调
+        if self._loop_monitor is not None:
+            self.monitor_btn = QPushButton("显示事件循环监控")
+            self.monitor_btn.setCheckable(True)
+            self.monitor_btn.toggled.connect(self.toggle_monitor_view)
+            layout.addWidget(self.monitor_btn)
+            self._monitor_lbl = QLabel()
+            self._monitor_lbl.setStyleSheet("color: #888; font-family: Consolas, monospace; font-size: 11px;")
+            self._monitor_lbl.setWordWrap(True)
+            self._monitor_lbl.hide()
+            layout.addWidget(self._monitor_lbl)
+            self._monitor_timer = QTimer(self)
+            self._monitor_timer.setInterval(1000)
+            self._monitor_timer.timeout.connect(self.update_monitor_text)
+
         layout.addStretch()
 
     def update_status_text(self, status_msg: str):
@@ -62,6 +104,31 @@ class MainConsole(QMainWindow):
         else:
             self._status_lbl.setStyleSheet("color: #888;")  # 默认灰色
 
+    def _start_metrics(self):
+        self._metrics_task = asyncio.create_task(self._metrics_server.start())
+
+    def update_queue_text(self):
+        card = self.engine_switcher.current_engine_ui
+        if card is None:
+            self._queue_lbl.setText("TTS 队列: -")
+            return
+        client = card.tts_client
+        admission = client.admission
+        self._queue_lbl.setText(f"TTS 队列: 积压 {client.backlog} / 有效容量 {client.capacity}"
+                                f"（拒绝 {admission.rejected}，截短 {admission.truncated}）")
+
+    def toggle_monitor_view(self, checked: bool):
+        self._monitor_lbl.setVisible(checked)
+        self.monitor_btn.setText("隐藏事件循环监控" if checked else "显示事件循环监控")
+        if checked:
+            self.update_monitor_text()
+            self._monitor_timer.start()
+        else:
+            self._monitor_timer.stop()
+
+    def update_monitor_text(self):
+        self._monitor_lbl.setText(self._loop_monitor.summary())
+
     def recreate_panel(self):
         """销毁旧面板并创建一个新的面板"""
 
@@ -80,4 +147,8 @@ class MainConsole(QMainWindow):
             self.panel.close()
         if self.engine_switcher:
             self.engine_switcher.close()
+        if self._metrics_server is not None:
+            self._metrics_task = asyncio.create_task(self._metrics_server.stop())
+        if self._loop_monitor is not None:
+            self._loop_monitor.stop()
         super().closeEvent(event)
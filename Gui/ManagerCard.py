@@ -1,14 +1,18 @@
 import logging
 from collections.abc import Callable
+from typing import TYPE_CHECKING
 
 from PySide6.QtWidgets import (QGroupBox, QVBoxLayout, QHBoxLayout,
                                QComboBox, QLabel, QFrame)
 from qasync import asyncSlot
 
-from Clients import AITTSClient, TTSClient
-from Clients.TTSClient import EdgeTTSClient
 from Exceptions import ManagerCardException
 
+if TYPE_CHECKING:
+    # 客户端只用于类型标注；运行时由引擎注册表在切换到对应引擎时才导入
+    from Clients.TTSClient import TTSClient, AITTSClient, EdgeTTSClient
+    from Clients.OfflineTTSClient import OfflineTTSClient
+
 
 class ManagerCard(QGroupBox):
     def __init__(self, title, client):
@@ -16,7 +20,7 @@ class ManagerCard(QGroupBox):
         self._tts_client = client
 
     @property
-    def tts_client(self) -> TTSClient:
+    def tts_client(self) -> "TTSClient":
         return self._tts_client
 
     async def prepare_to_close(self):
@@ -25,7 +29,7 @@ class ManagerCard(QGroupBox):
 
 
 class WeightsManagerCard(ManagerCard):
-    def __init__(self, ai_tts_client: AITTSClient):
+    def __init__(self, ai_tts_client: "AITTSClient"):
         super().__init__("模型权重管理", ai_tts_client)
 
         layout = QVBoxLayout(self)
@@ -138,14 +142,25 @@ class WeightsManagerCard(ManagerCard):
         await self._change_status(switch_weights, "切换模型")
 
 class EdgeTTSManagerCard(ManagerCard):
-    def __init__(self, edge_tts_client: EdgeTTSClient):
+    def __init__(self, edge_tts_client: "EdgeTTSClient"):
         super().__init__("Edge-TTS 管理", edge_tts_client)
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Edge-TTS 配置面板 (待开发)"))
 
 
 class OtherTTSManagerCard(ManagerCard):
-    def __init__(self, client: TTSClient):
+    def __init__(self, client: "TTSClient"):
         super().__init__("其他 TTS", client)
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("敬请期待..."))
+
+
+class OfflineTTSManagerCard(ManagerCard):
+    def __init__(self, offline_tts_client: "OfflineTTSClient"):
+        super().__init__("离线合成", offline_tts_client)
+        layout = QVBoxLayout(self)
+        command = " ".join(offline_tts_client.offline_config.command)
+        lbl_command = QLabel(f"合成命令: {command}")
+        lbl_command.setWordWrap(True)
+        layout.addWidget(lbl_command)
+        layout.addWidget(QLabel(f"工作进程数: {offline_tts_client.workers}"))
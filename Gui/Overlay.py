@@ -8,19 +8,22 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
 from qasync import asyncSlot
 
 from Clients import TTSClient, DanmakuClient
-from Models import ResponseMessageDto
+from Models import ResponseMessageDto, TTSQueueItem
 from .DanmakuSettingsPopup import DanmakuSettingsPopup
 
 
 class OverlayPanel(QWidget):
     new_danmu_signal = Signal(str, str)
     tts_client_signal = Signal(TTSClient)
+    MAX_DANMU_LABELS = 50
 
     def __init__(self, danmaku_client: DanmakuClient):
         super().__init__()
         self._tts_client: Optional[TTSClient] = None
         self._danmaku_client: DanmakuClient = danmaku_client
         self._danmaku_client.danmu_received.connect(self.add_danmu)
+        self._danmaku_client.danmu_batch_received.connect(self.add_danmu_batch)
+        self._danmaku_client.set_capacity_provider(self.tts_headroom)
         self._danmaku_task = None
 
         # GUI
@@ -125,27 +128,54 @@ class OverlayPanel(QWidget):
     def on_scroll_toggle(self, state):
         self._auto_scroll = (state == Qt.CheckState.Checked.value)
 
-    @Slot(ResponseMessageDto)
-    def add_danmu(self, res_dto: ResponseMessageDto):
+    def tts_headroom(self) -> int:
+        return self._tts_client.queue_headroom if self._tts_client else 0
+
+    @staticmethod
+    def _tts_item(res_dto: ResponseMessageDto) -> TTSQueueItem:
         msg = res_dto.msg
-        nick = msg.username
-        content = msg.content
-        if self._tts_client:
-            text = f"{nick}说:{content[:125].replace('[', '').replace(']', '')}"
-            self._tts_client.tts_queue_put(text)
+        content = msg.content[:125].replace('[', '').replace(']', '')
+        return TTSQueueItem(content, msg.username, msg.badge_level or 0, msg.badge_name or "", trace=res_dto.trace)
 
+    def _append_danmu_label(self, nick: str, content: str):
         text_html = f"<b style='color: #FFCA28; text-shadow: 1px 1px 2px black;'>{nick}:</b> <span style='color: white; text-shadow: 1px 1px 2px black;'>{content}</span>"
         lbl = QLabel(text_html)
         lbl.setStyleSheet("background: transparent; padding: 2px; font-size: 14px;")
         lbl.setWordWrap(True)
         self.danmu_layout.addWidget(lbl)
-        while self.danmu_layout.count() > 51:
+
+    def _trim_and_scroll(self):
+        while self.danmu_layout.count() > self.MAX_DANMU_LABELS + 1:
             item = self.danmu_layout.takeAt(1)
             if item.widget(): item.widget().deleteLater()
         if self._auto_scroll:
             bar = self.scroll.verticalScrollBar()
             QTimer.singleShot(50, lambda: bar.setValue(bar.maximum()))
 
+    @Slot(ResponseMessageDto)
+    def add_danmu(self, res_dto: ResponseMessageDto):
+        msg = res_dto.msg
+        nick = msg.username
+        content = msg.content
+        if self._tts_client:
+            self._tts_client.tts_queue_put(self._tts_item(res_dto))
+
+        self._append_danmu_label(nick, content)
+        self._trim_and_scroll()
+
+    @Slot(list)
+    def add_danmu_batch(self, batch: list[ResponseMessageDto]):
+        """批量渲染：整批只入队、裁剪和滚动一次"""
+        if not batch:
+            return
+        if self._tts_client:
+            self._tts_client.tts_queue_put_batch([self._tts_item(dto) for dto in batch])
+
+        # 超出面板容量的部分渲染后也会立即被裁掉，直接跳过
+        for dto in batch[-self.MAX_DANMU_LABELS:]:
+            self._append_danmu_label(dto.msg.username, dto.msg.content)
+        self._trim_and_scroll()
+
     def get_resize_direction(self, pos):
         x, y = pos.x(), pos.y()
         w, h = self.width(), self.height()
@@ -191,7 +221,7 @@ class OverlayPanel(QWidget):
 
     async def stop_worker(self):
         if self._tts_client:
-            self._tts_client.player.stop()
+            self._tts_client.stop_playback()
             await self._tts_client.stop_worker()
 
     def on_hide(self):
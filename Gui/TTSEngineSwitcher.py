@@ -5,8 +5,7 @@ from typing import Optional
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTabBar, QStackedWidget)
 from qasync import asyncSlot
 
-from Clients import AITTSClient
-from Clients.TTSClient import EdgeTTSClient, TTSClient
+from Clients import engines
 from .ManagerCard import ManagerCard
 from .Overlay import OverlayPanel
 
@@ -23,11 +22,11 @@ class TTSEngineSwitcher(QWidget):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # 引擎选择标签栏
+        # 引擎选择标签栏：按注册表生成，引擎模块在切换到对应标签时才导入
+        self._engines = engines()
         self.tab_bar = QTabBar()
-        self.tab_bar.addTab("GPT-SoVITS")
-        self.tab_bar.addTab("Edge-TTS (微软)")
-        self.tab_bar.addTab("更多引擎...")
+        for engine in self._engines:
+            self.tab_bar.addTab(engine.title)
         self.tab_bar.setStyleSheet("""
             QTabBar::tab {
                 background: rgba(255, 255, 255, 10);
@@ -76,24 +75,17 @@ class TTSEngineSwitcher(QWidget):
 
         # --- 根据索引创建对应的组件 ---
         try:
-            if index == 0:
-                from .ManagerCard import WeightsManagerCard
-                self.current_engine_ui = WeightsManagerCard(AITTSClient(self._config))
-
-            elif index == 1:
-                from .ManagerCard import EdgeTTSManagerCard
-                self.current_engine_ui = EdgeTTSManagerCard(EdgeTTSClient(self._config))
-
-            else:
-                from .ManagerCard import OtherTTSManagerCard
-                self.current_engine_ui = OtherTTSManagerCard(TTSClient(self._config))
+            engine = self._engines[index]
+            client_cls = engine.load_client()
+            card_cls = engine.load_card()
+            self.current_engine_ui = card_cls(client_cls(self._config))
 
             # --- 挂载到容器 ---
             self.container.addWidget(self.current_engine_ui)
             self.container.setCurrentWidget(self.current_engine_ui)
             self._danmaku_panel.tts_client_signal.emit(self.current_engine_ui.tts_client)
 
-            logging.info(f"已切换至引擎索引: {index}")
+            logging.info(f"已切换至引擎: {engine.name}")
 
         except Exception as e:
             logging.error(f"切换 TTS 引擎面板失败: {e}")
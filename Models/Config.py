@@ -5,6 +5,8 @@ class Config:
     def __init__(self, config: dict):
         self._danmaku_client = config.get(DefaultConfigName.danmaku_client, {})
         self._tts_client = config.get(DefaultConfigName.ttl_client, {})
+        self._metrics = config.get(DefaultConfigName.metrics, {})
+        self._loop_monitor = config.get(DefaultConfigName.loop_monitor, {})
 
     @property
     def danmaku_client(self) -> dict:
@@ -12,4 +14,12 @@ class Config:
 
     @property
     def tts_client(self) -> dict:
-        return self._tts_client
\ No newline at end of file
+        return self._tts_client
+
+    @property
+    def metrics(self) -> dict:
+        return self._metrics
+
+    @property
+    def loop_monitor(self) -> dict:
+        return self._loop_monitor
\ No newline at end of file
@@ -3,13 +3,116 @@ from Enums import DefaultConfigName
 
 class DanmakuClientConfig:
     def __init__(self, config: dict):
-        self._websocket_url = config[DefaultConfigName.rsocket_ws_url]
+        # rsocketUrL 可以是单个地址，也可以是用于故障切换的地址列表
+        urls = config[DefaultConfigName.rsocket_ws_url]
+        self._websocket_urls: list[str] = [urls] if isinstance(urls, str) else list(urls)
         self._task_ids = config[DefaultConfigName.task_ids]
+        # 批量投递：缓冲区内的弹幕按固定周期合并为一次信号发出
+        self._batch_mode: bool = config.get(DefaultConfigName.batch_mode, True)
+        self._batch_interval_ms: int = config.get(DefaultConfigName.batch_interval_ms, 100)
+        self._max_batch_size: int = config.get(DefaultConfigName.max_batch_size, 50)
+        self._buffer_size: int = config.get(DefaultConfigName.buffer_size, 500)
+        if self._batch_interval_ms < 1 or self._max_batch_size < 1 or self._buffer_size < 1:
+            raise ValueError("批量投递参数必须为正整数")
+        self._reconnect_base_delay: float = config.get(DefaultConfigName.reconnect_base_delay, 0.5)
+        self._reconnect_max_delay: float = config.get(DefaultConfigName.reconnect_max_delay, 30.0)
+        # 分片订阅：taskIds 分散到多个通道，可选每个分片独占一条 websocket
+        self._shard_count: int = config.get(DefaultConfigName.shard_count, 1)
+        self._shard_per_socket: bool = config.get(DefaultConfigName.shard_per_socket, False)
+        if self._shard_count < 1:
+            raise ValueError("分片数必须为正整数")
+        # 重连去重：窗口为 0 时关闭。没有服务端 id 的消息只在重新订阅后的 dedupReplayWindow 秒内去重，
+        # 避免误杀观众在窗口内重复发送的相同弹幕
+        self._dedup_window: float = config.get(DefaultConfigName.dedup_window, 60.0)
+        self._dedup_max_entries: int = config.get(DefaultConfigName.dedup_max_entries, 4096)
+        self._dedup_replay_window: float = config.get(DefaultConfigName.dedup_replay_window, 10.0)
+        # 流控：向服务端预授予的信用为若干个投递周期的渲染量，再加上 TTS 队列余量
+        self._credit_window_ticks: int = config.get(DefaultConfigName.credit_window_ticks, 2)
+        if self._credit_window_ticks < 1:
+            raise ValueError("信用窗口周期数必须为正整数")
+        # 抓包与回放：captureDir 为空时不抓包，replayPath 非空时改为从抓包文件回放
+        self._capture_dir: str = config.get(DefaultConfigName.capture_dir, "")
+        self._capture_max_bytes: int = config.get(DefaultConfigName.capture_max_bytes, 64 * 1024 * 1024)
+        self._capture_compress: bool = config.get(DefaultConfigName.capture_compress, False)
+        self._replay_path: str = config.get(DefaultConfigName.replay_path, "")
+        self._replay_speed: float = config.get(DefaultConfigName.replay_speed, 1.0)
 
     @property
     def websocket_url(self) -> str:
-        return self._websocket_url
+        return self._websocket_urls[0]
+
+    @property
+    def websocket_urls(self) -> list[str]:
+        return self._websocket_urls.copy()
 
     @property
     def task_ids(self) -> list[str]:
-        return self._task_ids.copy()
\ No newline at end of file
+        return self._task_ids.copy()
+
+    @property
+    def batch_mode(self) -> bool:
+        return self._batch_mode
+
+    @property
+    def batch_interval_ms(self) -> int:
+        return self._batch_interval_ms
+
+    @property
+    def max_batch_size(self) -> int:
+        return self._max_batch_size
+
+    @property
+    def buffer_size(self) -> int:
+        return self._buffer_size
+
+    @property
+    def reconnect_base_delay(self) -> float:
+        return self._reconnect_base_delay
+
+    @property
+    def reconnect_max_delay(self) -> float:
+        return self._reconnect_max_delay
+
+    @property
+    def shard_count(self) -> int:
+        return self._shard_count
+
+    @property
+    def shard_per_socket(self) -> bool:
+        return self._shard_per_socket
+
+    @property
+    def dedup_window(self) -> float:
+        return self._dedup_window
+
+    @property
+    def dedup_max_entries(self) -> int:
+        return self._dedup_max_entries
+
+    @property
+    def dedup_replay_window(self) -> float:
+        return self._dedup_replay_window
+
+    @property
+    def credit_window_ticks(self) -> int:
+        return self._credit_window_ticks
+
+    @property
+    def capture_dir(self) -> str:
+        return self._capture_dir
+
+    @property
+    def capture_max_bytes(self) -> int:
+        return self._capture_max_bytes
+
+    @property
+    def capture_compress(self) -> bool:
+        return self._capture_compress
+
+    @property
+    def replay_path(self) -> str:
+        return self._replay_path
+
+    @property
+    def replay_speed(self) -> float:
+        return self._replay_speed
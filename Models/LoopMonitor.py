@@ -0,0 +1,30 @@
+from Enums import DefaultConfigName
+
+
+class LoopMonitorConfig:
+    def __init__(self, config: dict):
+        # 采样间隔为 0 时不启动监控；报告路径为空时只在控制台中显示
+        self._sample_interval: float = config.get(DefaultConfigName.sample_interval, 0.01)
+        self._slow_callback_threshold: float = config.get(DefaultConfigName.slow_callback_threshold, 0.05)
+        self._report_path: str = config.get(DefaultConfigName.report_path, "")
+        self._report_interval: float = config.get(DefaultConfigName.report_interval, 10.0)
+
+    @property
+    def sample_interval(self) -> float:
+        return self._sample_interval
+
+    @property
+    def slow_callback_threshold(self) -> float:
+        return self._slow_callback_threshold
+
+    @property
+    def report_path(self) -> str:
+        return self._report_path
+
+    @property
+    def report_interval(self) -> float:
+        return self._report_interval
+
+    @property
+    def enabled(self) -> bool:
+        return self._sample_interval > 0
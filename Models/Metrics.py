@@ -0,0 +1,20 @@
+from Enums import DefaultConfigName
+
+
+class MetricsConfig:
+    def __init__(self, config: dict):
+        # 指标端点只监听本机；端口为 0 时不启动
+        self._host: str = config.get(DefaultConfigName.host, "127.0.0.1")
+        self._port: int = config.get(DefaultConfigName.port, 9464)
+
+    @property
+    def host(self) -> str:
+        return self._host
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def enabled(self) -> bool:
+        return self._port > 0
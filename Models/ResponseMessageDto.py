@@ -1,10 +1,28 @@
+import re
+
+from utils.FastJson import loads
+from utils.Metrics import MessageTrace, Stage
+
+# 字节级预过滤：不含 "type":"DANMU" 的帧无需完整解析即可丢弃
+# 内容里的引号在 JSON 中必然被转义，因此该模式只会命中真实的键值对
+_DANMU_TYPE_PATTERN = re.compile(rb'"type"\s*:\s*"DANMU"')
+
+
+def is_danmu_frame(raw: bytes) -> bool:
+    return _DANMU_TYPE_PATTERN.search(raw) is not None
+
+
 class DanmakuResponseMessage:
+    __slots__ = ("_badge_name", "_badge_level", "_content", "_username", "_msg_id", "_timestamp")
+
     def __init__(self, res_msg: dict):
         self._badge_name: str = res_msg['badgeName']
         self._badge_level: int = res_msg['badgeLevel']
         self._content: str = res_msg['content']
         self._username: str = res_msg['username']
-        self._user_avatar: str = res_msg['userAvatar']
+        # 服务端时间戳（毫秒）与消息 id，中继未提供时为 None；没有 id 时以时间戳代替
+        self._timestamp = res_msg.get('timestamp')
+        self._msg_id = res_msg.get('id', self._timestamp)
 
     @property
     def badge_name(self) -> str:
@@ -22,26 +40,74 @@ class DanmakuResponseMessage:
     def username(self) -> str:
         return self._username
 
+    @property
+    def msg_id(self):
+        return self._msg_id
+
+    @property
+    def timestamp(self) -> float | None:
+        return self._timestamp
+
 
 class ResponseMessageDto:
-    def __init__(self, msg_dto: dict):
+    """弹幕消息。可直接由 dict 构造，也可持有原始字节，在首次访问字段时才解码"""
+    __slots__ = ("_raw", "_platform", "_room_id", "_type", "_msg", "_trace")
+
+    def __init__(self, msg_dto: dict | bytes):
+        # 构造即视为收到，解码时记下解析完成的时刻
+        self._trace = MessageTrace()
+        if isinstance(msg_dto, dict):
+            self._raw = None
+            self._load(msg_dto)
+        else:
+            self._raw: bytes | None = bytes(msg_dto)
+
+    def _load(self, msg_dto: dict):
         self._platform: str = msg_dto['platform']
         self._room_id: str = msg_dto['roomId']
         self._type: str = msg_dto['type']
         self._msg: DanmakuResponseMessage = DanmakuResponseMessage(msg_dto["msg"])
+        self._trace.mark(Stage.parsed)
+
+    def _decode(self):
+        if self._raw is not None:
+            self._load(loads(self._raw))
+            self._raw = None
+
+    @property
+    def trace(self) -> MessageTrace:
+        return self._trace
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._raw is None
 
     @property
     def platform(self) -> str:
+        self._decode()
         return self._platform
 
     @property
     def room_id(self) -> str:
+        self._decode()
         return self._room_id
 
     @property
     def type(self) -> str:
+        self._decode()
         return self._type
 
     @property
     def msg(self) -> DanmakuResponseMessage:
+        self._decode()
         return self._msg
+
+    @property
+    def dedup_key(self) -> tuple:
+        msg = self.msg
+        return self._platform, self._room_id, msg.username, msg.content, msg.msg_id
+
+    @property
+    def has_server_id(self) -> bool:
+        """消息带有服务端分配的 id 或时间戳，去重键能区分同一用户重复发送的相同内容"""
+        return self.msg.msg_id is not None
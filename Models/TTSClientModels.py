@@ -1,16 +1,111 @@
+import asyncio
 from pathlib import PurePath, Path
 
 from Enums import DefaultConfigName
+from utils.FastJson import dumps
+from utils.Metrics import MessageTrace, Stage
 
 
 class TTSClientConfig:
     def __init__(self, tts_client_config: dict):
         self._max_queue_size: int = tts_client_config[DefaultConfigName.max_queue_size]
+        # 流水线深度：播放当前语音时最多提前合成的条数
+        self._pipeline_depth: int = tts_client_config.get(DefaultConfigName.pipeline_depth, 2)
+        if self._pipeline_depth < 1:
+            raise ValueError("流水线深度必须为正整数")
+        # 长文本按句切分：每段最多 chunkChars 个字符（0 表示不切分），单条消息最多同时合成 segmentConcurrency 段
+        self._chunk_chars: int = tts_client_config.get(DefaultConfigName.chunk_chars, 40)
+        self._segment_concurrency: int = tts_client_config.get(DefaultConfigName.segment_concurrency, 2)
+        if self._segment_concurrency < 1:
+            raise ValueError("分段并发数必须为正整数")
+        # 近似去重：与最近 fuzzyDedupWindow 秒内的条目比较，SimHash 汉明距离不超过 fuzzyDedupDistance 视为重复
+        self._fuzzy_dedup_window: float = tts_client_config.get(DefaultConfigName.fuzzy_dedup_window, 30.0)
+        self._fuzzy_dedup_distance: int = tts_client_config.get(DefaultConfigName.fuzzy_dedup_distance, 10)
+        # 调度：队满时的淘汰策略（lowest/oldest/random），弹幕超过 messageTtl 秒未合成即丢弃，0 表示不限
+        self._eviction_policy: str = tts_client_config.get(DefaultConfigName.eviction_policy, "lowest")
+        if self._eviction_policy not in ("lowest", "oldest", "random"):
+            raise ValueError(f"未知的淘汰策略: {self._eviction_policy}")
+        self._message_ttl: float = tts_client_config.get(DefaultConfigName.message_ttl, 30.0)
+        # 积压时加速播放：积压达到 speedUpBacklog 条或单条等待超过 speedUpWait 秒后开始加速，
+        # 队满或等待到 messageTtl 时达到 maxPlaybackRate 倍，1 表示不加速
+        self._max_playback_rate: float = tts_client_config.get(DefaultConfigName.max_playback_rate, 1.25)
+        if self._max_playback_rate < 1.0:
+            raise ValueError("最大播放倍速不能小于 1")
+        self._speed_up_backlog: int = tts_client_config.get(DefaultConfigName.speed_up_backlog, 2)
+        self._speed_up_wait: float = tts_client_config.get(DefaultConfigName.speed_up_wait, 10.0)
+        # 准入控制：预计开始播放的时间超过 latencyBudget 秒的弹幕拒绝入队，0 表示不启用；
+        # 截短后不足 admissionMinChars 个字符的直接拒绝
+        self._latency_budget: float = tts_client_config.get(DefaultConfigName.latency_budget, 20.0)
+        self._admission_min_chars: int = tts_client_config.get(DefaultConfigName.admission_min_chars, 4)
+        # 合成音频缓存：内存层字节上限；cacheDir 为空时不启用磁盘层
+        self._cache_memory_bytes: int = tts_client_config.get(DefaultConfigName.cache_memory_bytes, 32 * 1024 * 1024)
+        self._cache_dir: str = tts_client_config.get(DefaultConfigName.cache_dir, "")
+        self._cache_disk_bytes: int = tts_client_config.get(DefaultConfigName.cache_disk_bytes, 512 * 1024 * 1024)
 
     @property
     def max_queue_size(self) -> int:
         return self._max_queue_size
 
+    @property
+    def eviction_policy(self) -> str:
+        return self._eviction_policy
+
+    @property
+    def message_ttl(self) -> float:
+        return self._message_ttl
+
+    @property
+    def latency_budget(self) -> float:
+        return self._latency_budget
+
+    @property
+    def admission_min_chars(self) -> int:
+        return self._admission_min_chars
+
+    @property
+    def max_playback_rate(self) -> float:
+        return self._max_playback_rate
+
+    @property
+    def speed_up_backlog(self) -> int:
+        return self._speed_up_backlog
+
+    @property
+    def speed_up_wait(self) -> float:
+        return self._speed_up_wait
+
+    @property
+    def fuzzy_dedup_window(self) -> float:
+        return self._fuzzy_dedup_window
+
+    @property
+    def fuzzy_dedup_distance(self) -> int:
+        return self._fuzzy_dedup_distance
+
+    @property
+    def cache_memory_bytes(self) -> int:
+        return self._cache_memory_bytes
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    @property
+    def cache_disk_bytes(self) -> int:
+        return self._cache_disk_bytes
+
+    @property
+    def pipeline_depth(self) -> int:
+        return self._pipeline_depth
+
+    @property
+    def chunk_chars(self) -> int:
+        return self._chunk_chars
+
+    @property
+    def segment_concurrency(self) -> int:
+        return self._segment_concurrency
+
     @max_queue_size.setter
     def max_queue_size(self, max_queue_size: int):
         if not (isinstance(max_queue_size, int) or max_queue_size < 1):
@@ -20,24 +115,71 @@ class TTSClientConfig:
 
 class AIClientConfig:
     def __init__(self, tts_client_config: dict):
-        self._api_url: str = tts_client_config[DefaultConfigName.ai][DefaultConfigName.api_url]
+        # apiUrl 可以是单个地址，也可以是多个 GPT-SoVITS 实例的地址列表
+        api_url: str | list[str] = tts_client_config[DefaultConfigName.ai][DefaultConfigName.api_url]
+        self._api_urls: list[str] = [api_url] if isinstance(api_url, str) else list(api_url)
+        self._health_check_interval: float = tts_client_config[DefaultConfigName.ai].get(
+            DefaultConfigName.health_check_interval, 5.0)
+        # 后端 HTTP 调用：超时（秒）、最大重试次数与熔断参数
+        ai_config: dict = tts_client_config[DefaultConfigName.ai]
+        self._connect_timeout: float = ai_config.get(DefaultConfigName.connect_timeout, 3.0)
+        self._read_timeout: float = ai_config.get(DefaultConfigName.read_timeout, 30.0)
+        self._total_timeout: float = ai_config.get(DefaultConfigName.total_timeout, 60.0)
+        self._max_retries: int = ai_config.get(DefaultConfigName.max_retries, 2)
+        self._breaker_threshold: int = ai_config.get(DefaultConfigName.breaker_threshold, 5)
+        self._breaker_reset_timeout: float = ai_config.get(DefaultConfigName.breaker_reset_timeout, 10.0)
         self._ref_audio_root: str = tts_client_config[DefaultConfigName.ai][DefaultConfigName.ref_audio_root]
         self._gpt_sovits_root: str = tts_client_config[DefaultConfigName.ai][DefaultConfigName.gs_root]
+        # 流式合成：后端边合成边返回 PCM，降低首个音频到达的延迟
+        self._streaming_mode: bool = tts_client_config[DefaultConfigName.ai].get(DefaultConfigName.streaming_mode, False)
+        # 模型目录扫描结果的持久化索引文件，相对路径相对于 GPT-SoVITS 模型根目录
+        self._weights_index_path: str = tts_client_config[DefaultConfigName.ai].get(
+            DefaultConfigName.weights_index_path, "weightsIndex.json")
         self._version = "v4"
-        self._target_lang = "auto"
         self._ref_audio_path: str = ""
 
     @property
     def api_url(self) -> str:
-        return self._api_url
+        return self._api_urls[0]
+
+    @property
+    def api_urls(self) -> list[str]:
+        return self._api_urls.copy()
+
+    @property
+    def health_check_interval(self) -> float:
+        return self._health_check_interval
+
+    @property
+    def connect_timeout(self) -> float:
+        return self._connect_timeout
+
+    @property
+    def read_timeout(self) -> float:
+        return self._read_timeout
+
+    @property
+    def total_timeout(self) -> float:
+        return self._total_timeout
+
+    @property
+    def max_retries(self) -> int:
+        return self._max_retries
+
+    @property
+    def breaker_threshold(self) -> int:
+        return self._breaker_threshold
+
+    @property
+    def breaker_reset_timeout(self) -> float:
+        return self._breaker_reset_timeout
 
     @property
     def ref_audio_root(self) -> Path:
         return Path(self._ref_audio_root) / self._version
 
-    @property
-    def prompt_lang(self) -> str:
-        relative = self.ref_audio_path.replace(self._ref_audio_root, "")
+    def _prompt_lang(self, ref_audio_path: str) -> str:
+        relative = ref_audio_path.replace(self._ref_audio_root, "")
         if "中文" in relative:
             return "zh"
         elif "英语" in relative:
@@ -47,6 +189,10 @@ class AIClientConfig:
         else:
             raise ValueError("无法从 ref_audio_path 推断 prompt_lang，请检查路径是否正确")
 
+    @property
+    def prompt_lang(self) -> str:
+        return self._prompt_lang(self.ref_audio_path)
+
     @property
     def ref_audio_path(self) -> str:
         if not self._ref_audio_path:
@@ -55,51 +201,164 @@ class AIClientConfig:
 
     @property
     def prompt_text(self) -> str:
-        if not self._ref_audio_path:
-            raise ValueError("ref_audio_path 未设置")
-        text = PurePath(self._ref_audio_path).stem[5:]
-        return text
+        return PurePath(self.ref_audio_path).stem[5:]
 
     @property
     def version(self) -> str:
         return self._version
 
-    @property
-    def target_lang(self) -> str:
-        return self._target_lang
-
     @property
     def gpt_sovits_root(self) -> Path:
         return Path(self._gpt_sovits_root)
 
+    @property
+    def weights_index_path(self) -> Path:
+        path = Path(self._weights_index_path)
+        return path if path.is_absolute() else self.gpt_sovits_root / path
+
+    @property
+    def streaming_mode(self) -> bool:
+        return self._streaming_mode
+
+    @streaming_mode.setter
+    def streaming_mode(self, streaming_mode: bool):
+        self._streaming_mode = streaming_mode
+
     @ref_audio_path.setter
     def ref_audio_path(self, ref_audio_path: str):
         self._ref_audio_path = ref_audio_path
 
-    @target_lang.setter
-    def target_lang(self, target_lang: str):
-        if target_lang not in ["zh", "en", "ja", "auto"]:
-            raise ValueError()
-        self._target_lang = target_lang
-
     @version.setter
     def version(self, version: str):
         if version not in ["v1", "v2", "v2Pro", "v2ProPlus", "v3", "v4"]:
             raise ValueError()
         self._version = version
 
-    def post_req(self, text: str) -> dict:
-        req = {
+    def prompt_profile(self, weights_name: str, ref_audio_path: str) -> 'PromptProfile':
+        """由参考音频路径推出一次提示参数，供该模型下的所有请求复用"""
+        return PromptProfile(
+            weights_name=weights_name,
+            version=self._version,
+            ref_audio_path=ref_audio_path,
+            prompt_text=PurePath(ref_audio_path).stem[5:],
+            prompt_lang=self._prompt_lang(ref_audio_path)
+        )
+
+
+class PromptProfile:
+    """当前模型的提示参数，切换模型时生成一次，之后只读"""
+    __slots__ = ("_weights_name", "_version", "_ref_audio_path", "_prompt_text", "_prompt_lang")
+
+    def __init__(self, weights_name: str, version: str, ref_audio_path: str, prompt_text: str, prompt_lang: str):
+        self._weights_name = weights_name
+        self._version = version
+        self._ref_audio_path = ref_audio_path
+        self._prompt_text = prompt_text
+        self._prompt_lang = prompt_lang
+
+    @property
+    def weights_name(self) -> str:
+        return self._weights_name
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    @property
+    def ref_audio_path(self) -> str:
+        return self._ref_audio_path
+
+    @property
+    def prompt_text(self) -> str:
+        return self._prompt_text
+
+    @property
+    def prompt_lang(self) -> str:
+        return self._prompt_lang
+
+
+class TTSRequestSpec:
+    """一次合成请求的不可变描述：规范化后的文本、语言、分语言片段与提示参数。
+    请求体在构造时序列化一次，之后可以原样并发发往任意后端"""
+    __slots__ = ("_text", "_text_lang", "_segments", "_profile", "_streaming", "_payload")
+
+    def __init__(self, text: str, text_lang: str, segments: tuple[tuple[str, str], ...], profile: PromptProfile,
+                 streaming: bool):
+        self._text = text
+        self._text_lang = text_lang
+        self._segments = segments
+        self._profile = profile
+        self._streaming = streaming
+        self._payload = dumps({
             "text": text,
-            "text_lang": self.target_lang,
-            "ref_audio_path": self.ref_audio_path,
-            "prompt_text": self.prompt_text,
-            "prompt_lang": self.prompt_lang,
+            "text_lang": text_lang,
+            "ref_audio_path": profile.ref_audio_path,
+            "prompt_text": profile.prompt_text,
+            "prompt_lang": profile.prompt_lang,
             "text_split_method": "cut5",
             "media_type": "wav",
-            "streaming_mode": False
-        }
-        return req
+            "streaming_mode": streaming
+        })
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @property
+    def text_lang(self) -> str:
+        return self._text_lang
+
+    @property
+    def segments(self) -> tuple[tuple[str, str], ...]:
+        """按语言切分的连续片段: ((语言, 文本), ...)"""
+        return self._segments
+
+    @property
+    def profile(self) -> PromptProfile:
+        return self._profile
+
+    @property
+    def streaming(self) -> bool:
+        return self._streaming
+
+    @property
+    def payload(self) -> bytes:
+        """已序列化的 JSON 请求体"""
+        return self._payload
+
+    @property
+    def cache_fields(self) -> tuple[str, ...]:
+        """决定合成结果的全部参数，用作音频缓存的键"""
+        profile = self._profile
+        return (self._text, self._text_lang, profile.weights_name, profile.ref_audio_path, profile.prompt_text,
+                profile.version)
+
+
+class OfflineClientConfig:
+    def __init__(self, tts_client_config: dict):
+        offline_config: dict = tts_client_config.get(DefaultConfigName.offline, {})
+        # 本地命令行合成器，参数中的 {text} 替换为待朗读文本；不含 {text} 时文本从标准输入传入，WAV 从标准输出读取
+        self._command: list[str] = list(offline_config.get(
+            DefaultConfigName.command, ["espeak-ng", "--stdout", "-v", "cmn", "--stdin"]))
+        if not self._command:
+            raise ValueError("离线合成命令不能为空")
+        # 并行合成的工作进程数
+        self._workers: int = offline_config.get(DefaultConfigName.workers, 2)
+        if self._workers < 1:
+            raise ValueError("工作进程数必须为正整数")
+        self._synth_timeout: float = offline_config.get(DefaultConfigName.synth_timeout, 30.0)
+
+    @property
+    def command(self) -> list[str]:
+        return self._command.copy()
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def synth_timeout(self) -> float:
+        return self._synth_timeout
 
 
 class AIWeightsPaths:
@@ -119,3 +378,123 @@ class AIWeightsPaths:
     @property
     def ref_audio_path(self) -> str:
         return self._ref_audio_path
+
+
+class TTSQueueItem:
+    """TTS 队列中的一条待朗读文本，进入流水线后持有其合成任务。
+
+    近似重复的弹幕会合并到同一条目，朗读时带上发送人数。
+    """
+
+    def __init__(self, content: str, nick: str = "", badge_level: int = 0, badge_name: str = "", kind: str = "danmu",
+                 trace: MessageTrace | None = None):
+        self._content = content
+        self._nick = nick
+        self._nicks = {nick}
+        self._count = 1
+        self._badge_level = badge_level
+        self._badge_name = badge_name
+        self._kind = kind
+        # 由调度器在入队时写入
+        self.enqueued_at = 0.0
+        self.deadline = 0.0
+        self.score = 0.0
+        # 由客户端在排入播放时写入：实际使用的变速倍率
+        self.playback_rate = 1.0
+        self._task: asyncio.Task | None = None
+        self._evicted = False
+        self._stream = None
+        self._stream_ready = asyncio.Event()
+        # 各阶段时间戳，来自弹幕时沿用其收到与解析的时刻
+        self._trace = trace or MessageTrace()
+
+    @property
+    def content(self) -> str:
+        return self._content
+
+    @property
+    def nick(self) -> str:
+        return self._nick
+
+    @property
+    def badge_level(self) -> int:
+        return self._badge_level
+
+    @property
+    def badge_name(self) -> str:
+        return self._badge_name
+
+    @property
+    def kind(self) -> str:
+        return self._kind
+
+    @property
+    def trace(self) -> MessageTrace:
+        return self._trace
+
+    @property
+    def count(self) -> int:
+        """合并进该条目的弹幕条数（含自身）"""
+        return self._count
+
+    @property
+    def prefix(self) -> str:
+        """朗读时加在正文前的发送人前缀，没有昵称时为空"""
+        if not self._nick:
+            return ""
+        if len(self._nicks) > 1:
+            return f"{self._nick}等{len(self._nicks)}人说:"
+        return f"{self._nick}说:"
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self._content
+
+    def truncate(self, max_chars: int):
+        """截短到朗读文本（含昵称前缀）不超过 max_chars 个字符"""
+        overflow = len(self.text) - max_chars
+        if overflow > 0:
+            self._content = self._content[:max(len(self._content) - overflow, 1)]
+
+    def merge(self, other: 'TTSQueueItem'):
+        self._count += other._count
+        self._nicks |= other._nicks
+        self._badge_level = max(self._badge_level, other._badge_level)
+
+    @property
+    def task(self) -> asyncio.Task | None:
+        return self._task
+
+    @task.setter
+    def task(self, task: asyncio.Task):
+        self._task = task
+
+    @property
+    def evicted(self) -> bool:
+        return self._evicted
+
+    @property
+    def stream(self):
+        """流式合成时的 PcmStream，非流式为 None"""
+        return self._stream
+
+    def attach_stream(self, stream):
+        self._trace.mark_once(Stage.first_byte)
+        self._stream = stream
+        self._stream_ready.set()
+
+    async def wait_ready(self):
+        """等待合成完成，或流式音频开始到达"""
+        ready = asyncio.ensure_future(self._stream_ready.wait())
+        try:
+            await asyncio.wait([ready, self._task], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ready.cancel()
+
+    def evict(self, reason: str = "evicted"):
+        """被挤出队列：标记、记录原因并取消进行中的合成请求"""
+        if not self._evicted:
+            self._trace.drop(reason)
+        self._evicted = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
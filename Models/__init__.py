@@ -1,14 +1,24 @@
 from .Config import Config
 from .DanmakuClient import DanmakuClientConfig
-from .ResponseMessageDto import DanmakuResponseMessage, ResponseMessageDto
-from .TTSClientModels import TTSClientConfig, AIClientConfig, AIWeightsPaths
+from .LoopMonitor import LoopMonitorConfig
+from .Metrics import MetricsConfig
+from .ResponseMessageDto import DanmakuResponseMessage, ResponseMessageDto, is_danmu_frame
+from .TTSClientModels import (TTSClientConfig, AIClientConfig, OfflineClientConfig, AIWeightsPaths, TTSQueueItem,
+                              PromptProfile, TTSRequestSpec)
 
 __all__ = [
     "DanmakuResponseMessage",
     "ResponseMessageDto",
     "TTSClientConfig",
     "AIClientConfig",
+    "OfflineClientConfig",
     "AIWeightsPaths",
+    "TTSQueueItem",
+    "PromptProfile",
+    "TTSRequestSpec",
     "Config",
-    "DanmakuClientConfig"
+    "DanmakuClientConfig",
+    "MetricsConfig",
+    "LoopMonitorConfig",
+    "is_danmu_frame"
 ]
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""DanmakuClient 接收链路基准测试。
+
+在子进程中启动替身服务（或连接已有地址），统计持续吞吐、进程 CPU、
+单条解析耗时，以及从客户端收到帧到信号发出的延迟分位数。
+延迟两端都取本进程的 perf_counter，不受服务端与本机时钟偏差影响。
+
+    python -m Tools.IngestionBenchmark --rate 500 --duration 20 --shard-count 2
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import socket
+import statistics
+import sys
+import time
+
+from PySide6.QtCore import QCoreApplication
+from qasync import QEventLoop
+
+from Clients import DanmakuClient
+from Models import ResponseMessageDto, is_danmu_frame
+from utils.Metrics import Stage
+from Tools.StandInServer import StandInHandler, SyntheticProfile, add_profile_arguments, profile_from_args, run_server
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure_parse_cost(samples: int = 20000) -> float:
+    """单条弹幕从原始字节到字段可读的平均耗时（微秒），含字节级预过滤"""
+    handler = StandInHandler(SyntheticProfile(noise_ratio=0.0))
+    frames = [handler._danmu_frame("bench") for _ in range(1000)]
+    start = time.perf_counter()
+    for i in range(samples):
+        raw = frames[i % len(frames)]
+        if is_danmu_frame(raw):
+            _ = ResponseMessageDto(raw).msg.content
+    return (time.perf_counter() - start) / samples * 1e6
+
+
+class _Collector:
+    def __init__(self):
+        self.count = 0
+        self.latencies: list[float] = []
+        self.recording = False
+
+    def on_batch(self, batch: list[ResponseMessageDto]):
+        self.on_messages(batch)
+
+    def on_single(self, msg_dto: ResponseMessageDto):
+        self.on_messages([msg_dto])
+
+    def on_messages(self, messages: list[ResponseMessageDto]):
+        if not self.recording:
+            return
+        now = time.perf_counter()
+        self.count += len(messages)
+        for msg_dto in messages:
+            self.latencies.append((now - msg_dto.trace.stamp(Stage.received)) * 1000)
+
+
+def wait_for_port(host: str, port: int, server: multiprocessing.Process, timeout: float = 30.0):
+    """轮询直到替身服务开始监听；子进程提前退出或超时则报错"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            if not server.is_alive():
+                raise RuntimeError(f"替身服务进程已退出，退出码 {server.exitcode}")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"等待替身服务监听 {host}:{port} 超时")
+            time.sleep(0.05)
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    config = {
+        "rsocketUrL": [args.url],
+        "taskIds": [f"room{i}" for i in range(args.rooms)],
+        "batchMode": not args.no_batch,
+        "batchIntervalMs": args.batch_interval_ms,
+        "maxBatchSize": args.max_batch_size,
+        "bufferSize": args.buffer_size,
+        "shardCount": args.shard_count,
+        "shardPerSocket": args.shard_per_socket,
+    }
+    client = DanmakuClient(config)
+    collector = _Collector()
+    client.danmu_batch_received.connect(collector.on_batch)
+    client.danmu_received.connect(collector.on_single)
+
+    await client.start()
+    await asyncio.sleep(args.warmup)
+    collector.recording = True
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    collector.recording = False
+    dropped = client.dropped_count
+    await client.stop()
+
+    latencies = sorted(collector.latencies)
+    return {
+        "messages": collector.count,
+        "throughput": collector.count / wall if wall else 0.0,
+        "cpu_seconds": cpu,
+        "cpu_us_per_msg": cpu / collector.count * 1e6 if collector.count else 0.0,
+        "dropped": dropped,
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else 0.0,
+        "mean": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DanmakuClient 接收链路基准测试")
+    parser.add_argument("--url", default=None, help="已有服务地址，不填则在子进程启动替身服务")
+    parser.add_argument("--port", type=int, default=9765)
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--no-batch", action="store_true", help="关闭批量投递，逐条发信号")
+    parser.add_argument("--batch-interval-ms", type=int, default=100)
+    parser.add_argument("--max-batch-size", type=int, default=50)
+    parser.add_argument("--buffer-size", type=int, default=500)
+    parser.add_argument("--shard-count", type=int, default=1)
+    parser.add_argument("--shard-per-socket", action="store_true")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    server = None
+    if args.url is None:
+        args.url = f"ws://127.0.0.1:{args.port}/"
+        server = multiprocessing.get_context("spawn").Process(
+            target=run_server,
+            args=("127.0.0.1", args.port, profile_from_args(args), args.replay, args.replay_speed),
+            daemon=True
+        )
+        server.start()
+        wait_for_port("127.0.0.1", args.port, server)
+
+    app = QCoreApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    try:
+        with loop:
+            result = loop.run_until_complete(run_benchmark(args))
+    finally:
+        if server is not None:
+            server.terminate()
+
+    print(f"收到弹幕:   {result['messages']} 条，持续吞吐 {result['throughput']:.1f} 条/秒，缓冲区丢弃 {result['dropped']} 条")
+    print(f"进程 CPU:   {result['cpu_seconds']:.2f}s，{result['cpu_us_per_msg']:.1f} µs/条")
+    print(f"解析耗时:   {measure_parse_cost():.2f} µs/条")
+    print(f"收到→信号:  p50 {result['p50']:.1f}ms  p90 {result['p90']:.1f}ms  "
+          f"p99 {result['p99']:.1f}ms  max {result['max']:.1f}ms  mean {result['mean']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
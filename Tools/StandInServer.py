@@ -0,0 +1,221 @@
+"""本地 RSocket-over-WebSocket 替身服务，用于在没有真实中继时压测 DanmakuClient。
+
+与中继使用相同的协议：客户端发起 request_channel，并在通道上发送
+{"taskIds": [...], "cmd": "SUBSCRIBE"}，服务端随后推送 DANMU 帧。
+可按固定速率与突发曲线生成合成弹幕，也可回放 DanmakuRecorder 录制的抓包文件。
+
+    python -m Tools.StandInServer --port 9000 --rate 200 --burst-rate 2000 --burst-every 10
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import time
+
+from aiohttp import web
+from reactivestreams.subscriber import DefaultSubscriber
+from rsocket.payload import Payload
+from rsocket.request_handler import BaseRequestHandler
+from rsocket.streams.stream_from_async_generator import StreamFromAsyncGenerator
+from rsocket.transports.aiohttp_websocket import websocket_handler_factory
+
+from Clients.DanmakuRecorder import capture_files, read_capture
+from utils.FastJson import loads, dumps
+
+_SAMPLE_CONTENTS = ["666", "哈哈哈哈", "草草草", "主播晚上好", "这波操作可以", "来了来了", "？？？",
+                    "前方高能", "awsl", "今天唱什么歌呀", "打卡", "好耶"]
+
+
+class SyntheticProfile:
+    """合成弹幕的速率曲线：基础速率，每隔 burst_every 秒出现持续 burst_duration 秒的突发。
+
+    速率是整个服务的总条数/秒，由所有连接上的活跃通道均分，客户端分片数不影响总速率。
+    """
+
+    def __init__(self, rate: float = 50.0, burst_rate: float = 0.0, burst_every: float = 0.0,
+                 burst_duration: float = 2.0, noise_ratio: float = 0.2):
+        self._rate = rate
+        self._burst_rate = burst_rate
+        self._burst_every = burst_every
+        self._burst_duration = burst_duration
+        self._noise_ratio = noise_ratio
+        self._channels = 0
+
+    @property
+    def noise_ratio(self) -> float:
+        return self._noise_ratio
+
+    @property
+    def channels(self) -> int:
+        return self._channels
+
+    def open_channel(self):
+        self._channels += 1
+
+    def close_channel(self):
+        self._channels -= 1
+
+    def channel_rate_at(self, elapsed: float) -> float:
+        """单个通道分得的速率"""
+        return self.rate_at(elapsed) / max(self._channels, 1)
+
+    def rate_at(self, elapsed: float) -> float:
+        if self._burst_every > 0 and self._burst_rate > 0 and elapsed % self._burst_every < self._burst_duration:
+            return self._burst_rate
+        return self._rate
+
+
+class _SubscribeReceiver(DefaultSubscriber):
+    """接收客户端在通道上发来的 SUBSCRIBE 命令"""
+
+    def __init__(self, task_ids: asyncio.Future):
+        super().__init__()
+        self._task_ids = task_ids
+
+    def on_subscribe(self, subscription):
+        super().on_subscribe(subscription)
+        subscription.request(16)
+
+    def on_next(self, value, is_complete=False):
+        try:
+            data = loads(value.data)
+        except Exception as e:
+            logging.warning(f"[StandIn] 无法解析订阅命令: {e}")
+            return
+        if data.get("cmd") == "SUBSCRIBE" and not self._task_ids.done():
+            self._task_ids.set_result(list(data.get("taskIds", [])))
+
+
+class StandInHandler(BaseRequestHandler):
+    _TICK = 0.01
+
+    def __init__(self, profile: SyntheticProfile, replay_path: str | None = None, replay_speed: float = 1.0):
+        super().__init__()
+        self._profile = profile
+        self._replay_path = replay_path
+        self._replay_speed = replay_speed
+        self._sequence = itertools.count()
+
+    async def request_channel(self, payload: Payload):
+        task_ids = asyncio.get_running_loop().create_future()
+        if self._replay_path:
+            publisher = StreamFromAsyncGenerator(lambda: self._replay_frames(task_ids))
+        else:
+            publisher = StreamFromAsyncGenerator(lambda: self._synthetic_frames(task_ids))
+        return publisher, _SubscribeReceiver(task_ids)
+
+    def _danmu_frame(self, task_id: str) -> bytes:
+        seq = next(self._sequence)
+        if random.random() < self._profile.noise_ratio:
+            return dumps({"platform": "standin", "roomId": task_id, "type": "GIFT",
+                          "msg": {"giftName": "小心心", "count": 1, "username": f"user{seq % 997}"}})
+        return dumps({
+            "platform": "standin",
+            "roomId": task_id,
+            "type": "DANMU",
+            "msg": {
+                "badgeName": "替身",
+                "badgeLevel": seq % 30,
+                "content": random.choice(_SAMPLE_CONTENTS),
+                "username": f"user{seq % 997}",
+                "userAvatar": "https://example.invalid/avatar.png",
+                "id": f"{id(self)}-{seq}",
+                "timestamp": time.time() * 1000
+            }
+        })
+
+    async def _synthetic_frames(self, task_ids_future: asyncio.Future):
+        task_ids = await task_ids_future or ["standin"]
+        rooms = itertools.cycle(task_ids)
+        start = time.monotonic()
+        due = 0.0
+        last = start
+        self._profile.open_channel()
+        try:
+            while True:
+                now = time.monotonic()
+                rate = self._profile.channel_rate_at(now - start)
+                # 客户端不给信用时生成器会暂停，积压最多保留 1 秒，其余按中继削峰处理
+                due = min(due + rate * (now - last), max(rate, 1.0))
+                last = now
+                while due >= 1:
+                    due -= 1
+                    yield Payload(data=self._danmu_frame(next(rooms))), False
+                await asyncio.sleep(self._TICK)
+        finally:
+            self._profile.close_channel()
+
+    async def _replay_frames(self, task_ids_future: asyncio.Future):
+        await task_ids_future
+        first_ts = None
+        start = time.monotonic()
+        for path in capture_files(self._replay_path):
+            for received_at, raw in read_capture(path):
+                if self._replay_speed > 0:
+                    if first_ts is None:
+                        first_ts = received_at
+                    delay = (received_at - first_ts) / self._replay_speed - (time.monotonic() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                yield Payload(data=raw), False
+        logging.info("[StandIn] 抓包回放结束")
+        # 保持通道打开，模拟中继无新消息
+        await asyncio.Event().wait()
+
+
+def create_app(profile: SyntheticProfile, replay_path: str | None = None, replay_speed: float = 1.0) -> web.Application:
+    app = web.Application()
+    handler = websocket_handler_factory(
+        handler_factory=lambda: StandInHandler(profile, replay_path, replay_speed)
+    )
+    app.add_routes([web.get("/", handler)])
+    return app
+
+
+async def serve(host: str, port: int, profile: SyntheticProfile, replay_path: str | None = None,
+                replay_speed: float = 1.0) -> web.AppRunner:
+    runner = web.AppRunner(create_app(profile, replay_path, replay_speed))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logging.info(f"[StandIn] 替身服务已启动: ws://{host}:{port}/")
+    return runner
+
+
+def run_server(host: str, port: int, profile: SyntheticProfile, replay_path: str | None = None,
+               replay_speed: float = 1.0):
+    """阻塞运行替身服务，供基准测试在子进程中调用"""
+    async def run():
+        await serve(host, port, profile, replay_path, replay_speed)
+        await asyncio.Event().wait()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run())
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--rate", type=float, default=50.0, help="基础总速率（条/秒），均分到所有活跃通道")
+    parser.add_argument("--burst-rate", type=float, default=0.0, help="突发期间总速率（条/秒）")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="突发周期（秒），0 表示无突发")
+    parser.add_argument("--burst-duration", type=float, default=2.0, help="每次突发持续时间（秒）")
+    parser.add_argument("--noise-ratio", type=float, default=0.2, help="非 DANMU 帧占比")
+    parser.add_argument("--replay", default=None, help="回放抓包文件或目录，替代合成弹幕")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="回放倍速，0 表示全速")
+
+
+def profile_from_args(args: argparse.Namespace) -> SyntheticProfile:
+    return SyntheticProfile(args.rate, args.burst_rate, args.burst_every, args.burst_duration, args.noise_ratio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="弹幕中继替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    web.run_app(create_app(profile_from_args(args), args.replay, args.replay_speed), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,15 @@ import json
 import logging
 import sys
 
-from PySide6.QtWidgets import QApplication
-from qasync import QEventLoop
 
-from Gui import MainConsole
+def main(conf_path: str = r".\configTemple.json"):
+    # Qt 与界面模块在函数内导入：离线合成的工作进程以 spawn 方式启动时会重新导入本模块，
+    # 放在模块顶层会让每个工作进程都载入一遍 Qt
+    from PySide6.QtWidgets import QApplication
+    from qasync import QEventLoop
 
+    from Gui import MainConsole
 
-def main(conf_path: str = r".\configTemple.json"):
     # 初始化日志
     logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
     with open(conf_path, "r", encoding="utf-8") as f:
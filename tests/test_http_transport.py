@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+
+from Clients.HttpTransport import HttpTransport, CircuitState
+
+
+class _HangingSession:
+    """请求永远不返回，用于模拟探测请求进行中被取消"""
+    closed = False
+
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def request(self, *args, **kwargs):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+class HalfOpenProbeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelled_probe_releases_breaker(self):
+        url = "http://backend.test/tts"
+        transport = HttpTransport(breaker_threshold=1, breaker_reset_timeout=0)
+        session = transport._session = _HangingSession()
+        breaker = transport.breaker(url)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.half_open)
+
+        async def probe():
+            async with transport.request("POST", url):
+                pass
+
+        task = asyncio.create_task(probe())
+        await session.started.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        # 被取消的探测不计入失败，下一个请求可以重新探测
+        self.assertEqual(breaker.state, CircuitState.half_open)
+        self.assertTrue(transport.available(url))
+        self.assertTrue(breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,17 +8,77 @@ class ConfigGenerator:
     def get_default_config(cls):
         default_config = {
             DefaultConfigName.danmaku_client: {
-                DefaultConfigName.rsocket_ws_url: "ws://localhost:9000",
+                DefaultConfigName.rsocket_ws_url: [
+                    "ws://localhost:9000"
+                ],
                 DefaultConfigName.task_ids: [
                     "id"
                 ],
+                DefaultConfigName.batch_mode: True,
+                DefaultConfigName.batch_interval_ms: 100,
+                DefaultConfigName.max_batch_size: 50,
+                DefaultConfigName.buffer_size: 500,
+                DefaultConfigName.reconnect_base_delay: 0.5,
+                DefaultConfigName.reconnect_max_delay: 30.0,
+                DefaultConfigName.shard_count: 1,
+                DefaultConfigName.shard_per_socket: False,
+                DefaultConfigName.dedup_window: 60.0,
+                DefaultConfigName.dedup_max_entries: 4096,
+                DefaultConfigName.dedup_replay_window: 10.0,
+                DefaultConfigName.credit_window_ticks: 2,
+                DefaultConfigName.capture_dir: "",
+                DefaultConfigName.capture_max_bytes: 64 * 1024 * 1024,
+                DefaultConfigName.capture_compress: False,
+                DefaultConfigName.replay_path: "",
+                DefaultConfigName.replay_speed: 1.0,
+            },
+            DefaultConfigName.metrics: {
+                DefaultConfigName.host: "127.0.0.1",
+                DefaultConfigName.port: 9464,
+            },
+            DefaultConfigName.loop_monitor: {
+                DefaultConfigName.sample_interval: 0.01,
+                DefaultConfigName.slow_callback_threshold: 0.05,
+                DefaultConfigName.report_path: "",
+                DefaultConfigName.report_interval: 10.0,
             },
             DefaultConfigName.ttl_client: {
                 DefaultConfigName.max_queue_size: 5,
+                DefaultConfigName.pipeline_depth: 2,
+                DefaultConfigName.chunk_chars: 40,
+                DefaultConfigName.segment_concurrency: 2,
+                DefaultConfigName.max_playback_rate: 1.25,
+                DefaultConfigName.speed_up_backlog: 2,
+                DefaultConfigName.speed_up_wait: 10.0,
+                DefaultConfigName.latency_budget: 20.0,
+                DefaultConfigName.admission_min_chars: 4,
+                DefaultConfigName.eviction_policy: "lowest",
+                DefaultConfigName.message_ttl: 30.0,
+                DefaultConfigName.fuzzy_dedup_window: 30.0,
+                DefaultConfigName.fuzzy_dedup_distance: 10,
+                DefaultConfigName.cache_memory_bytes: 32 * 1024 * 1024,
+                DefaultConfigName.cache_dir: "",
+                DefaultConfigName.cache_disk_bytes: 512 * 1024 * 1024,
                 DefaultConfigName.ai: {
                     DefaultConfigName.gs_root: "test/GPT-SoVITS",
-                    DefaultConfigName.api_url: "http://localhost:9001",
+                    DefaultConfigName.api_url: [
+                        "http://localhost:9001"
+                    ],
+                    DefaultConfigName.health_check_interval: 5.0,
+                    DefaultConfigName.connect_timeout: 3.0,
+                    DefaultConfigName.read_timeout: 30.0,
+                    DefaultConfigName.total_timeout: 60.0,
+                    DefaultConfigName.max_retries: 2,
+                    DefaultConfigName.breaker_threshold: 5,
+                    DefaultConfigName.breaker_reset_timeout: 10.0,
                     DefaultConfigName.ref_audio_root: "test/audio",
+                    DefaultConfigName.streaming_mode: False,
+                    DefaultConfigName.weights_index_path: "weightsIndex.json",
+                },
+                DefaultConfigName.offline: {
+                    DefaultConfigName.command: ["espeak-ng", "--stdout", "-v", "cmn", "--stdin"],
+                    DefaultConfigName.workers: 2,
+                    DefaultConfigName.synth_timeout: 30.0,
                 }
             }
         }
@@ -0,0 +1,22 @@
+"""JSON 后端：安装了 orjson 时优先使用，否则回退到标准库"""
+try:
+    import orjson
+
+    BACKEND = "orjson"
+
+    def loads(data: bytes | str):
+        return orjson.loads(data)
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:
+    import json
+
+    BACKEND = "json"
+
+    def loads(data: bytes | str):
+        return json.loads(data)
+
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
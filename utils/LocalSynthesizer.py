@@ -0,0 +1,81 @@
+"""离线合成的工作进程侧：执行本地命令行合成器并把输出整理成 16 bit PCM WAV。
+
+运行在 ProcessPoolExecutor 的子进程中。本模块只依赖标准库，子进程反序列化任务时不会因此载入 Qt；
+但 spawn 启动的子进程还会重新导入主模块，主模块顶层导入的内容同样会被载入（见 main.py）。
+"""
+import array
+import struct
+import subprocess
+import sys
+
+_TEXT_PLACEHOLDER = "{text}"
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _to_int16(pcm: bytes, audio_format: int, sample_width: int) -> bytes:
+    if audio_format == _WAVE_FORMAT_IEEE_FLOAT and sample_width == 4:
+        samples = array.array("f", pcm[:len(pcm) // 4 * 4])
+        return array.array("h", (max(-32768, min(32767, int(s * 32767))) for s in samples)).tobytes()
+    if audio_format != _WAVE_FORMAT_PCM:
+        raise ValueError(f"不支持的 WAV 编码: {audio_format}")
+    if sample_width == 2:
+        return pcm[:len(pcm) // 2 * 2]
+    if sample_width == 1:
+        # 8 bit PCM 为无符号
+        return array.array("h", ((b - 128) << 8 for b in pcm)).tobytes()
+    if sample_width in (3, 4):
+        # 只保留高 16 位
+        usable = len(pcm) // sample_width * sample_width
+        return b"".join(pcm[i + sample_width - 2:i + sample_width] for i in range(0, usable, sample_width))
+    raise ValueError(f"不支持的采样位宽: {sample_width * 8} bit")
+
+
+def to_pcm16_wav(data: bytes) -> bytes:
+    """解析合成器输出的 WAV（数据长度可以是占位值），转换为长度正确的 16 bit PCM WAV"""
+    if sys.byteorder != "little":
+        # array 按本机字节序解释样本，WAV 为小端
+        raise ValueError("不支持大端平台")
+    if len(data) < 12 or data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("合成器输出不是 WAV 格式")
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV 缺少 fmt 块")
+            audio_format, channels, sample_rate, bits = fmt
+            end = min(body + chunk_size, len(data))
+            pcm = _to_int16(data[body:end], audio_format, bits // 8)
+            return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + len(pcm), b"WAVE", b"fmt ", 16,
+                               _WAVE_FORMAT_PCM, channels, sample_rate, sample_rate * channels * 2, channels * 2,
+                               16, b"data", len(pcm)) + pcm
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if audio_format == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                # 扩展格式的真实编码在子格式 GUID 的前两个字节
+                audio_format = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = audio_format, channels, sample_rate, bits
+        offset = body + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV 缺少 data 块")
+
+
+def run_synthesizer(command: list[str], text: str, timeout: float) -> bytes:
+    """执行合成命令。参数中的 {text} 替换为文本；没有占位符时文本从标准输入传入（推荐，文本不经过命令行解析）"""
+    use_stdin = not any(_TEXT_PLACEHOLDER in arg for arg in command)
+    if use_stdin:
+        result = subprocess.run(command, input=text.encode(), capture_output=True, timeout=timeout)
+    else:
+        # 文本来自观众，以 "-" 开头时会被合成器当作选项解析；前面补一个空格，朗读结果不变
+        safe_text = " " + text if text.startswith("-") else text
+        argv = [arg.replace(_TEXT_PLACEHOLDER, safe_text) for arg in command]
+        # 不使用标准输入时也不继承界面进程的标准输入
+        result = subprocess.run(argv, stdin=subprocess.DEVNULL, capture_output=True, timeout=timeout)
+    if result.returncode != 0:
+        stderr = result.stderr.decode(errors="replace").strip()
+        raise RuntimeError(f"合成命令退出码 {result.returncode}: {stderr[-200:]}")
+    return to_pcm16_wav(result.stdout)
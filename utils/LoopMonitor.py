@@ -0,0 +1,267 @@
+"""事件循环监控：高频采样调度延迟，记录运行超过阈值的回调与协程步骤及其调用栈。
+
+GUI、网络 I/O、JSON 解析与播放轮询共用同一个 qasync 事件循环，任何一步阻塞都会表现为音频卡顿或弹幕面板冻结。
+- 采样协程每隔 interval 秒醒来一次，实际醒来时间与预期之差即为调度延迟；
+- 包装 asyncio.Handle._run，为每个回调计时，超过阈值的按回调（协程按其函数名）汇总；
+- 看门狗线程发现循环超过阈值没有心跳时，用 sys._current_frames 抓取循环线程此刻的调用栈。
+  不经过 Handle 的 Qt 槽函数（如信号触发的 add_danmu）也能由此定位。
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from utils.Metrics import registry
+
+_STACK_LIMIT = 20
+_MAX_OFFENDERS = 200
+# 采样窗口：按采样间隔折算最多保留的延迟样本数
+_WINDOW_SECONDS = 60.0
+
+loop_lag = registry.histogram("event_loop_lag_seconds", "事件循环调度延迟",
+                              (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+slow_callbacks = registry.counter("event_loop_slow_callbacks_total", "运行超过阈值的回调次数")
+
+
+def _code_location(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _handle_task(handle: asyncio.Handle) -> asyncio.Task | None:
+    task = getattr(handle._callback, "__self__", None)
+    return task if isinstance(task, asyncio.Task) else None
+
+
+def _handle_name(handle: asyncio.Handle) -> str:
+    task = _handle_task(handle)
+    if task is not None:
+        coro = task.get_coro()
+        code = getattr(coro, "cr_code", None) or getattr(coro, "gi_code", None)
+        return f"Task {_code_location(code)}" if code is not None else f"Task {task.get_name()}"
+    callback = handle._callback
+    while hasattr(callback, "func"):
+        # functools.partial
+        callback = callback.func
+    code = getattr(callback, "__code__", None) or getattr(getattr(callback, "__func__", None), "__code__", None)
+    return _code_location(code) if code is not None else repr(callback)
+
+
+def _handle_stack(handle: asyncio.Handle) -> str:
+    """看门狗没能抓到现场时的替代：协程给出本步结束后挂起的位置"""
+    task = _handle_task(handle)
+    if task is None:
+        return ""
+    frames = [(frame, frame.f_lineno) for frame in task.get_stack(limit=_STACK_LIMIT)]
+    return "挂起于:\n" + "".join(traceback.StackSummary.extract(frames).format())
+
+
+class SlowCallback:
+    __slots__ = ("name", "count", "total", "max", "stack")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.stack = ""
+
+    def observe(self, seconds: float, stack: str):
+        self.count += 1
+        self.total += seconds
+        if seconds >= self.max:
+            self.max = seconds
+            # 保留最慢一次的调用栈
+            if stack:
+                self.stack = stack
+
+
+class _Stall:
+    __slots__ = ("beat", "name", "stack")
+
+    def __init__(self, beat: float, name: str, stack: str):
+        self.beat = beat
+        self.name = name
+        self.stack = stack
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.01, threshold: float = 0.05, report_path: str = "",
+                 report_interval: float = 10.0):
+        self._interval = interval
+        self._threshold = threshold
+        self._report_path = report_path
+        self._report_interval = report_interval
+        self._lags: deque[float] = deque(maxlen=max(int(_WINDOW_SECONDS / interval), 1))
+        self._offenders: dict[str, SlowCallback] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id = 0
+        self._original_run = None
+        self._sampler: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        # 以下字段由循环线程写、看门狗线程读，单个属性的读写在 GIL 下是原子的
+        self._beat = 0.0
+        self._stall: _Stall | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def start(self):
+        """在事件循环线程中调用"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._install()
+        self._stop_event = threading.Event()
+        self._watchdog = threading.Thread(target=self._watch, args=(self._stop_event,), name="LoopMonitorWatchdog",
+                                          daemon=True)
+        self._watchdog.start()
+        self._sampler = asyncio.create_task(self._sample())
+        logging.info(f"[LoopMonitor] 已启动，采样间隔 {self._interval * 1000:.0f}ms，"
+                     f"慢回调阈值 {self._threshold * 1000:.0f}ms")
+
+    def stop(self):
+        if self._loop is None:
+            return
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+        self._stop_event.set()
+        self._uninstall()
+        self._loop = None
+        if self._report_path:
+            self._write_report(self.report())
+
+    def _install(self):
+        monitor = self
+        original = self._original_run = asyncio.Handle._run
+
+        def _run(handle):
+            if handle._loop is not monitor._loop:
+                return original(handle)
+            beat = monitor._beat
+            start = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                end = monitor._beat = time.perf_counter()
+                if end - start >= monitor._threshold:
+                    monitor._on_slow_handle(handle, end - start, beat)
+
+        _run.__wrapped__ = original
+        asyncio.Handle._run = _run
+
+    def _uninstall(self):
+        # 只在包装仍是自己时才还原，避免覆盖其它工具后来安装的包装
+        if getattr(asyncio.Handle._run, "__wrapped__", None) is self._original_run:
+            asyncio.Handle._run = self._original_run
+        self._original_run = None
+
+    def _on_slow_handle(self, handle: asyncio.Handle, seconds: float, beat: float):
+        stall = self._stall
+        if stall is not None and stall.beat == beat:
+            # 看门狗在本次回调阻塞期间抓到了现场
+            self._stall = None
+            stack = stall.stack
+        else:
+            stack = _handle_stack(handle)
+        self._record(_handle_name(handle), seconds, stack)
+
+    def _record(self, name: str, seconds: float, stack: str):
+        slow_callbacks.inc()
+        offender = self._offenders.get(name)
+        if offender is None:
+            if len(self._offenders) >= _MAX_OFFENDERS:
+                # 淘汰累计耗时最少的一项
+                del self._offenders[min(self._offenders.values(), key=lambda item: item.total).name]
+            offender = self._offenders[name] = SlowCallback(name)
+            logging.warning(f"[LoopMonitor] {name} 阻塞事件循环 {seconds * 1000:.0f}ms")
+        offender.observe(seconds, stack)
+
+    def _watch(self, stop_event: threading.Event):
+        poll = self._threshold / 2
+        while not stop_event.wait(poll):
+            beat = self._beat
+            stall = self._stall
+            if stall is not None and stall.beat == beat:
+                continue
+            if time.perf_counter() - beat < self._threshold:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=_STACK_LIMIT))
+            self._stall = _Stall(beat, _code_location(frame.f_code), stack)
+            del frame
+
+    async def _sample(self):
+        interval = self._interval
+        expected = time.perf_counter() + interval
+        next_report = expected + self._report_interval
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            lag = max(now - expected, 0.0)
+            expected = now + interval
+            self._lags.append(lag)
+            loop_lag.observe(lag)
+            stall = self._stall
+            if stall is not None:
+                # 看门狗抓到的阻塞没有被任何 Handle 认领，来自 Qt 槽函数等不经过 Handle 的代码
+                self._stall = None
+                if lag >= self._threshold:
+                    self._record(f"Qt {stall.name}", lag, stall.stack)
+            if self._report_path and now >= next_report:
+                next_report = now + self._report_interval
+                await asyncio.to_thread(self._write_report, self.report())
+
+    def lag_percentiles(self) -> dict[str, float]:
+        """最近一分钟调度延迟的分位数（秒）"""
+        if not self._lags:
+            return {}
+        lags = sorted(self._lags)
+        last = len(lags) - 1
+        return {
+            "p50": lags[int(last * 0.5)],
+            "p90": lags[int(last * 0.9)],
+            "p99": lags[int(last * 0.99)],
+            "max": lags[last],
+        }
+
+    def offenders(self, limit: int = 10) -> list[SlowCallback]:
+        """按累计阻塞时间排序的慢回调"""
+        return sorted(self._offenders.values(), key=lambda item: item.total, reverse=True)[:limit]
+
+    def summary(self, limit: int = 5) -> str:
+        percentiles = self.lag_percentiles()
+        if percentiles:
+            lines = ["调度延迟 " + "  ".join(f"{key} {value * 1000:.1f}ms" for key, value in percentiles.items())]
+        else:
+            lines = ["调度延迟: 暂无样本"]
+        for offender in self.offenders(limit):
+            lines.append(f"{offender.max * 1000:6.0f}ms  x{offender.count:<4} {offender.name}")
+        return "\n".join(lines)
+
+    def report(self, limit: int = 20) -> str:
+        lines = [time.strftime("%Y-%m-%d %H:%M:%S"), self.summary(0), ""]
+        for offender in self.offenders(limit):
+            lines.append(f"== {offender.name}: {offender.count} 次，累计 {offender.total * 1000:.0f}ms，"
+                         f"最长 {offender.max * 1000:.0f}ms")
+            if offender.stack:
+                lines.append(offender.stack.rstrip())
+            lines.append("")
+        return "\n".join(lines)
+
+    def _write_report(self, text: str):
+        try:
+            with open(self._report_path, "w", encoding="utf-8") as report_file:
+                report_file.write(text)
+        except OSError as e:
+            logging.error(f"[LoopMonitor] 写入报告失败: {e}")
@@ -0,0 +1,230 @@
+"""进程内指标：计数器、固定分桶直方图与逐条消息的阶段时间戳，按 Prometheus 文本格式导出。
+
+热路径上只有整数自增、一次 perf_counter 和列表赋值；分桶与格式化在消息结束或抓取时才进行。
+所有指标都只在事件循环线程中更新，不加锁。
+"""
+import bisect
+import math
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Callable
+
+# 秒级延迟的默认分桶
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self._label_names = labels
+        self._values: dict[tuple[str, ...], int] = {} if labels else {(): 0}
+
+    def inc(self, *label_values: str, amount: int = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> int:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, count in self._values.items():
+            lines.append(f"{self.name}{_labels(self._label_names, values)} {count}")
+        return lines
+
+
+class Gauge:
+    """抓取时才调用回调取值"""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help_text
+        self._read = read
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_number(self._read())}"]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                 labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self._buckets = tuple(sorted(buckets))
+        self._label_names = labels
+        # 每组标签: [各桶计数（非累计）..., +Inf 桶计数, 总和]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self._buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self._buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self._buckets, math.inf), series[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self._label_names, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self._label_names, values)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self._label_names, values)} {cumulative}")
+        return lines
+
+
+class RateMeter:
+    """最近 window 秒的平均速率，按秒分桶"""
+
+    def __init__(self, window: int = 10):
+        self._window = window
+        self._buckets: deque[list[int]] = deque()
+
+    def mark(self, amount: int = 1):
+        second = int(time.monotonic())
+        if self._buckets and self._buckets[-1][0] == second:
+            self._buckets[-1][1] += amount
+        else:
+            self._buckets.append([second, amount])
+            while self._buckets[0][0] <= second - self._window:
+                self._buckets.popleft()
+
+    def rate(self) -> float:
+        now = int(time.monotonic())
+        return sum(count for second, count in self._buckets if second > now - self._window) / self._window
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, help_text, read))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                  labels: tuple[str, ...] = ()) -> Histogram:
+        return self.register(Histogram(name, help_text, buckets, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class Stage(IntEnum):
+    received = 0
+    parsed = 1
+    enqueued = 2
+    synthesis_start = 3
+    first_byte = 4
+    synthesis_done = 5
+    playback_start = 6
+    playback_end = 7
+
+
+registry = MetricsRegistry()
+_message_rate = RateMeter()
+
+danmaku_received = registry.counter("danmaku_received_total", "收到的弹幕帧数")
+messages_per_second = registry.gauge("danmaku_messages_per_second", "最近 10 秒平均每秒收到的弹幕数",
+                                     _message_rate.rate)
+tts_enqueued = registry.counter("tts_enqueued_total", "进入 TTS 队列的消息数")
+tts_played = registry.counter("tts_played_total", "播放完毕的消息数")
+dropped = registry.counter("danmaku_dropped_total", "被丢弃的消息数", ("reason",))
+dedup_lookups = registry.counter("danmaku_dedup_lookups_total", "重放去重查询次数", ("result",))
+cache_lookups = registry.counter("tts_cache_lookups_total", "音频缓存查询次数", ("result",))
+backend_errors = registry.counter("tts_backend_errors_total", "后端调用失败次数", ("backend",))
+model_switch_seconds = registry.histogram("tts_model_switch_seconds", "后端切换模型耗时", labels=("backend",))
+warm_up_seconds = registry.histogram("tts_warm_up_seconds", "切换模型后首次预热合成耗时", labels=("backend",))
+stage_seconds = registry.histogram("tts_stage_seconds", "相邻两个阶段之间的耗时", labels=("stage",))
+time_to_audio = registry.histogram("tts_time_to_audio_seconds", "从收到消息到开始播放的耗时")
+end_to_end = registry.histogram("tts_end_to_end_seconds", "从收到消息到播放结束的耗时")
+
+
+def record_received():
+    danmaku_received.inc()
+    _message_rate.mark()
+
+
+class MessageTrace:
+    """一条消息在各阶段的时间戳（perf_counter 秒），结束或丢弃时一次性写入直方图与计数器"""
+    __slots__ = ("_stamps", "_closed")
+
+    def __init__(self, received: bool = True):
+        self._stamps = [0.0] * len(Stage)
+        self._closed = False
+        if received:
+            self._stamps[Stage.received] = time.perf_counter()
+
+    def mark(self, stage: Stage):
+        self._stamps[stage] = time.perf_counter()
+
+    def mark_once(self, stage: Stage):
+        if not self._stamps[stage]:
+            self._stamps[stage] = time.perf_counter()
+
+    def stamp(self, stage: Stage) -> float:
+        return self._stamps[stage]
+
+    def _observe_stages(self):
+        previous = 0.0
+        for stage in Stage:
+            stamp = self._stamps[stage]
+            if not stamp:
+                continue
+            if previous:
+                stage_seconds.observe(stamp - previous, stage.name)
+            previous = stamp
+
+    def finish(self):
+        """播放结束"""
+        if self._closed:
+            return
+        self._closed = True
+        self.mark(Stage.playback_end)
+        self._observe_stages()
+        origin = next((stamp for stamp in self._stamps if stamp), 0.0)
+        if self._stamps[Stage.playback_start]:
+            time_to_audio.observe(self._stamps[Stage.playback_start] - origin)
+        end_to_end.observe(self._stamps[Stage.playback_end] - origin)
+        tts_played.inc()
+
+    def drop(self, reason: str):
+        """被丢弃：记录原因与丢弃前经过的各阶段"""
+        if self._closed:
+            return
+        self._closed = True
+        self._observe_stages()
+        dropped.inc(reason)
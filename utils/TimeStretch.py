@@ -0,0 +1,64 @@
+"""保持音高的变速：WSOLA（波形相似重叠相加）。
+
+每个输出帧在名义输入位置附近的容差范围内，选取与上一帧自然延续最相似的输入片段，
+再以 50% 重叠的 Hann 窗相加。相似度搜索在降采样的单声道信号上用 np.correlate 完成，
+帧的提取与重叠相加整体向量化，不逐样本循环。
+"""
+import numpy as np
+
+_FRAME_SECONDS = 0.02
+_TOLERANCE_SECONDS = 0.01
+# 相似度搜索的降采样倍数，只影响选帧精度，不影响输出音质
+_SEARCH_DECIMATION = 4
+
+
+def _select_positions(mono: np.ndarray, frame: int, hop: int, tolerance: int, rate: float, count: int) -> np.ndarray:
+    positions = np.empty(count, dtype=np.int64)
+    positions[0] = 0
+    step = _SEARCH_DECIMATION
+    search = mono[::step]
+    frame_d = max(frame // step, 1)
+    limit = len(mono) - frame
+    for k in range(1, count):
+        # 上一帧在输入中的自然延续，作为相似度模板
+        natural = positions[k - 1] + hop
+        nominal = int(k * hop * rate)
+        start = max(min(nominal - tolerance, limit), 0)
+        end = max(min(nominal + tolerance, limit), start)
+        template = search[natural // step:natural // step + frame_d]
+        region = search[start // step:end // step + frame_d]
+        if natural + frame > len(mono) or len(region) < len(template) or not template.any():
+            # 接近末尾或静音段，直接取名义位置
+            positions[k] = min(max(nominal, 0), limit)
+            continue
+        scores = np.correlate(region, template, mode="valid")
+        positions[k] = min(start + int(np.argmax(scores)) * step, limit)
+    return positions
+
+
+def time_stretch(pcm: bytes, channels: int, sample_rate: int, rate: float) -> bytes:
+    """把 16 bit 交错 PCM 加速 rate 倍（rate > 1 变快），音高不变。过短的音频原样返回"""
+    if rate <= 1.0 or not pcm:
+        return pcm
+    samples = np.frombuffer(pcm, dtype="<i2")
+    samples = samples[:len(samples) // channels * channels].reshape(-1, channels).astype(np.float32)
+    hop = max(int(sample_rate * _FRAME_SECONDS) // 2, 1)
+    frame = hop * 2
+    tolerance = int(sample_rate * _TOLERANCE_SECONDS)
+    if len(samples) < frame * 4:
+        return pcm
+    count = int((len(samples) - frame) / (hop * rate)) + 1
+    positions = _select_positions(samples.mean(axis=1), frame, hop, tolerance, rate, count)
+
+    # (帧数, 帧长, 声道) 一次性取出所有选中的帧并加窗
+    frames = samples[positions[:, None] + np.arange(frame)[None, :]]
+    window = np.hanning(frame + 1)[:frame].astype(np.float32)
+    frames *= window[None, :, None]
+    out = np.zeros(((count + 1) * hop, channels), dtype=np.float32)
+    # 50% 重叠：每帧前半与上一帧后半相加，周期 Hann 窗重叠后增益为 1
+    out[:count * hop] += frames[:, :hop].reshape(-1, channels)
+    out[hop:(count + 1) * hop] += frames[:, hop:].reshape(-1, channels)
+    # 首尾各半帧只有一个窗覆盖，直接取原始样本，分块处理时块与块之间不会出现音量凹陷
+    out[:hop] = samples[:hop]
+    out[count * hop:] = samples[positions[-1] + hop:positions[-1] + frame]
+    return np.clip(out, -32768, 32767).astype("<i2").tobytes()
@@ -1,5 +1,7 @@
+from . import FastJson
 from .Config import ConfigGenerator
 
 __all__ = [
-    "ConfigGenerator"
+    "ConfigGenerator",
+    "FastJson"
 ]